@@ -0,0 +1,110 @@
+"""
+Ekspor batch sebagai satu arsip ZIP atau tar.
+
+Hasil di-encode oleh BatchExecutor dan langsung ditulis ke arsip begitu
+setiap item selesai (sesuai urutan input), jadi hanya item yang sedang
+berjalan yang ada di memori. Arsip ditulis ke file object apa pun, biasanya
+file sementara di disk. Output gambar (PNG/JPEG/WebP) sudah terkompresi,
+sehingga disimpan tanpa kompresi ulang (ZIP_STORED); manifest JSON
+dikompresi biasa.
+"""
+import io
+import json
+import os
+import tarfile
+import time
+import zipfile
+
+from batch import BatchExecutor
+
+ARCHIVE_FORMATS = {
+    # nama: (ekstensi, mime)
+    "ZIP": (".zip", "application/zip"),
+    "TAR": (".tar", "application/x-tar"),
+}
+
+MANIFEST_NAME = "manifest.json"
+
+
+# ========================================================================
+# Penulis arsip
+# ========================================================================
+class ArchiveWriter:
+    """Menulis entri (nama, bytes) satu per satu ke arsip ZIP atau tar."""
+
+    def __init__(self, fileobj, archive_format="ZIP"):
+        if archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"Format arsip tidak didukung: {archive_format}")
+        self.archive_format = archive_format
+        self.names = set()
+        if archive_format == "ZIP":
+            self._archive = zipfile.ZipFile(fileobj, "w")
+        else:
+            self._archive = tarfile.open(fileobj=fileobj, mode="w")
+
+    def unique_name(self, name):
+        """Nama entri yang belum dipakai (upload dengan nama sama diberi akhiran _2, _3, ...)."""
+        stem, ext = os.path.splitext(name)
+        candidate, n = name, 1
+        while candidate in self.names:
+            n += 1
+            candidate = f"{stem}_{n}{ext}"
+        self.names.add(candidate)
+        return candidate
+
+    def add(self, name, data, compress=False):
+        if self.archive_format == "ZIP":
+            info = zipfile.ZipInfo(name, time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+            self._archive.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self._archive.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        self._archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+# ========================================================================
+# Ekspor batch
+# ========================================================================
+def _json_value(value):
+    return value.tolist() if hasattr(value, "tolist") else str(value)
+
+
+def write_archive(fileobj, items, encode, archive_format="ZIP", manifest=True,
+                  max_workers=None, progress=None):
+    """
+    Meng-encode `items` berupa (nama output, input) secara paralel dan menulis
+    hasilnya ke arsip di `fileobj` sesuai urutan input.
+
+    `encode(input)` mengembalikan (bytes, metadata). Metadata dilengkapi nama
+    file di arsip dan ukuran output, lalu jika `manifest` aktif seluruhnya
+    disimpan sebagai manifest.json. Item dengan bytes None (gagal diproses)
+    hanya dicatat di manifest. Mengembalikan daftar metadata tersebut.
+    """
+    entries = []
+    executor = BatchExecutor(max_workers=max_workers)
+    with ArchiveWriter(fileobj, archive_format) as archive:
+        names = [archive.unique_name(name) for name, _ in items]
+        results = executor.map(lambda item: encode(item[1]), items, progress=progress)
+        for idx, (data, metadata) in results:
+            if data is None:
+                entries.append(dict(metadata, file=None, bytes=0))
+                continue
+            archive.add(names[idx], data)
+            entries.append(dict(metadata, file=names[idx], bytes=len(data)))
+
+        if manifest:
+            text = json.dumps(entries, indent=2, default=_json_value)
+            archive.add(MANIFEST_NAME, text.encode("utf-8"), compress=True)
+    return entries
@@ -0,0 +1,255 @@
+"""
+Backend komputasi untuk resize dan warp affine.
+
+Semua backend punya antarmuka yang sama (`resize`, `warp_affine`) dan
+dipanggil oleh transform_core:
+- opencv : cv2 pada array NumPy (SIMD bawaan OpenCV), selalu tersedia
+- umat   : OpenCV T-API (cv2.UMat), memakai runtime OpenCL (termasuk OpenCL CPU)
+- numba  : kernel warp bilinear hasil JIT Numba, paralel per pita baris (opsional)
+
+Backend dipilih sekali per proses. Dengan IMAGE_TRANSFORM_BACKEND=auto
+(default) setiap backend yang tersedia dikalibrasi dengan benchmark mikro
+singkat; backend yang hasilnya tidak cocok dengan OpenCV (di luar toleransi)
+tidak dipakai, lalu yang tercepat dipilih.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # Numba opsional
+    numba = None
+
+BACKEND_ENV = "IMAGE_TRANSFORM_BACKEND"
+
+# Toleransi kecocokan dengan OpenCV: rata-rata selisih absolut per piksel (level 0-255)
+TOLERANCE = 1.0
+
+# Ukuran gambar kalibrasi (kecil agar pemilihan saat startup tetap singkat)
+CALIBRATION_SHAPE = (512, 512, 3)
+
+
+# ========================================================================
+# Backend
+# ========================================================================
+class OpenCVBackend:
+    """cv2.resize / cv2.warpAffine langsung pada array NumPy."""
+
+    name = "opencv"
+
+    @staticmethod
+    def available():
+        return True
+
+    def resize(self, image, dsize, interpolation=cv2.INTER_LINEAR):
+        return cv2.resize(image, dsize, interpolation=interpolation)
+
+    def warp_affine(self, image, M, dsize, flags=cv2.INTER_LINEAR, border_value=(255, 255, 255)):
+        return cv2.warpAffine(image, M, dsize, flags=flags,
+                              borderMode=cv2.BORDER_CONSTANT, borderValue=border_value)
+
+
+class UMatBackend(OpenCVBackend):
+    """OpenCV T-API: operasi dijalankan lewat OpenCL jika ada perangkat (CPU/GPU)."""
+
+    name = "umat"
+
+    @staticmethod
+    def available():
+        return cv2.ocl.haveOpenCL()
+
+    def __init__(self):
+        cv2.ocl.setUseOpenCL(True)
+
+    def resize(self, image, dsize, interpolation=cv2.INTER_LINEAR):
+        return cv2.resize(cv2.UMat(image), dsize, interpolation=interpolation).get()
+
+    def warp_affine(self, image, M, dsize, flags=cv2.INTER_LINEAR, border_value=(255, 255, 255)):
+        return cv2.warpAffine(cv2.UMat(image), M, dsize, flags=flags,
+                              borderMode=cv2.BORDER_CONSTANT, borderValue=border_value).get()
+
+
+if numba is not None:
+    # nogil + pita baris di thread Python, bukan parallel=True: lapisan thread
+    # bawaan Numba (workqueue) macet saat proses keluar jika dipanggil dari
+    # thread selain main thread, padahal BatchExecutor memakai thread pool.
+    @numba.njit(nogil=True, cache=True)
+    def _warp_bilinear(src, M_inv, out, border, row_start, row_stop):
+        """Warp bilinear uint8 (H x W x C) baris [row_start, row_stop), matriks invers 2x3, border konstan."""
+        w, channels = out.shape[1], out.shape[2]
+        src_h, src_w = src.shape[0], src.shape[1]
+        for y in range(row_start, row_stop):
+            for x in range(w):
+                sx = M_inv[0, 0] * x + M_inv[0, 1] * y + M_inv[0, 2]
+                sy = M_inv[1, 0] * x + M_inv[1, 1] * y + M_inv[1, 2]
+                x0 = int(np.floor(sx))
+                y0 = int(np.floor(sy))
+                fx = sx - x0
+                fy = sy - y0
+                inside = 0 <= x0 and x0 + 1 < src_w and 0 <= y0 and y0 + 1 < src_h
+                for c in range(channels):
+                    if inside:
+                        p00 = src[y0, x0, c]
+                        p01 = src[y0, x0 + 1, c]
+                        p10 = src[y0 + 1, x0, c]
+                        p11 = src[y0 + 1, x0 + 1, c]
+                    else:
+                        p00 = src[y0, x0, c] if 0 <= x0 < src_w and 0 <= y0 < src_h else border[c]
+                        p01 = src[y0, x0 + 1, c] if 0 <= x0 + 1 < src_w and 0 <= y0 < src_h else border[c]
+                        p10 = src[y0 + 1, x0, c] if 0 <= x0 < src_w and 0 <= y0 + 1 < src_h else border[c]
+                        p11 = src[y0 + 1, x0 + 1, c] if 0 <= x0 + 1 < src_w and 0 <= y0 + 1 < src_h else border[c]
+                    value = ((p00 * (1 - fx) + p01 * fx) * (1 - fy)
+                             + (p10 * (1 - fx) + p11 * fx) * fy)
+                    out[y, x, c] = min(max(int(value + 0.5), 0), 255)
+
+
+class NumbaBackend(OpenCVBackend):
+    """
+    Warp bilinear uint8 dengan kernel Numba (satu lintasan). Output dibagi
+    menjadi pita baris yang dikerjakan paralel oleh thread pool bersama.
+    Resize dan interpolasi lain tetap memakai OpenCV.
+    """
+
+    name = "numba"
+    _pool = None
+
+    @staticmethod
+    def available():
+        return numba is not None
+
+    @classmethod
+    def pool(cls):
+        if cls._pool is None:
+            cls._pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+        return cls._pool
+
+    def warp_affine(self, image, M, dsize, flags=cv2.INTER_LINEAR, border_value=(255, 255, 255)):
+        if flags != cv2.INTER_LINEAR or image.dtype != np.uint8:
+            return super().warp_affine(image, M, dsize, flags, border_value)
+
+        src = image if image.ndim == 3 else image[:, :, None]
+        w, h = dsize
+        out = np.empty((h, w, src.shape[2]), dtype=np.uint8)
+        # Sama seperti cv2: kanal yang tidak disebut di border_value bernilai 0
+        border = np.zeros(src.shape[2], dtype=np.float64)
+        values = np.asarray(border_value, dtype=np.float64)[:src.shape[2]]
+        border[:len(values)] = values
+        src = np.ascontiguousarray(src)
+        M_inv = cv2.invertAffineTransform(M)
+        step = max(16, -(-h // (os.cpu_count() or 1)))
+        bands = [
+            self.pool().submit(_warp_bilinear, src, M_inv, out, border, y, min(y + step, h))
+            for y in range(0, h, step)
+        ]
+        for band in bands:
+            band.result()
+        return out if image.ndim == 3 else out[:, :, 0]
+
+
+BACKENDS = {
+    "opencv": OpenCVBackend,
+    "umat": UMatBackend,
+    "numba": NumbaBackend,
+}
+
+
+# ========================================================================
+# Kalibrasi dan pemilihan backend
+# ========================================================================
+def _calibration_case():
+    """Gambar sintetis dan matriks rotasi + skala untuk kalibrasi."""
+    rng = np.random.default_rng(0)
+    h, w = CALIBRATION_SHAPE[:2]
+    image = cv2.GaussianBlur(rng.integers(0, 256, CALIBRATION_SHAPE, dtype=np.uint8), (5, 5), 1.5)
+    M = cv2.getRotationMatrix2D((w / 2, h / 2), 30, 0.8)
+    return image, M, (w, h)
+
+
+def calibrate(names=None, repeat=3):
+    """
+    Mengukur setiap backend yang tersedia pada warp + resize gambar kalibrasi.
+    Mengembalikan daftar dict (name, ok, mean_diff, seconds); `ok` False jika
+    backend tidak tersedia, gagal, atau hasilnya di luar TOLERANCE.
+    """
+    image, M, dsize = _calibration_case()
+    half = (dsize[0] // 2, dsize[1] // 2)
+    reference = OpenCVBackend().warp_affine(image, M, dsize)
+
+    results = []
+    for name in names or BACKENDS:
+        cls = BACKENDS[name]
+        result = {"name": name, "ok": False, "mean_diff": None, "seconds": None}
+        results.append(result)
+        if not cls.available():
+            continue
+        try:
+            backend = cls()
+            # Pemanggilan pertama memicu kompilasi JIT / inisialisasi OpenCL
+            output = backend.warp_affine(image, M, dsize)
+            backend.resize(image, half)
+        except Exception as exc:
+            result["error"] = str(exc)
+            continue
+
+        result["mean_diff"] = float(np.abs(output.astype(np.int16) - reference).mean())
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            backend.warp_affine(image, M, dsize)
+            backend.resize(image, half)
+            timings.append(time.perf_counter() - start)
+        result["seconds"] = min(timings)
+        result["ok"] = result["mean_diff"] <= TOLERANCE
+    return results
+
+
+_lock = threading.Lock()
+_backend = None
+_calibration = []
+
+
+def select_backend(names=None):
+    """Mengkalibrasi backend lalu memakai yang tercepat dari yang lolos toleransi."""
+    global _calibration
+    _calibration = calibrate(names)
+    passing = [r for r in _calibration if r["ok"]]
+    best = min(passing, key=lambda r: r["seconds"])["name"] if passing else "opencv"
+    return BACKENDS[best]()
+
+
+def _create_backend(name):
+    if name == "auto":
+        return select_backend()
+    if name not in BACKENDS:
+        raise ValueError(f"Backend tidak dikenal: {name}")
+    if not BACKENDS[name].available():
+        raise ValueError(f"Backend {name} tidak tersedia di sistem ini")
+    return BACKENDS[name]()
+
+
+def set_backend(name="auto"):
+    """Memilih backend berdasarkan nama, atau "auto" untuk kalibrasi."""
+    global _backend
+    with _lock:
+        _backend = _create_backend(name)
+    return _backend
+
+
+def get_backend():
+    """Backend aktif; dipilih sekali per proses (env IMAGE_TRANSFORM_BACKEND, default auto)."""
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                _backend = _create_backend(os.environ.get(BACKEND_ENV, "auto"))
+    return _backend
+
+
+def calibration_results():
+    """Hasil kalibrasi terakhir (kosong jika backend dipilih manual)."""
+    return list(_calibration)
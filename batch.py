@@ -0,0 +1,65 @@
+import contextvars
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+# ========================================================================
+# Executor batch paralel
+# ========================================================================
+class BatchExecutor:
+    """
+    Menjalankan satu fungsi pada banyak item secara paralel dengan antrian
+    terbatas. Hasil dikembalikan sesuai urutan input.
+
+    - max_workers  : jumlah worker (default: jumlah core CPU)
+    - use_processes: pakai process pool; fungsi dan item harus bisa di-pickle
+    - max_pending  : jumlah item maksimum yang sedang diproses/menunggu diambil
+    - memory_limit : batas perkiraan memori (byte) untuk item yang sedang berjalan
+    """
+
+    def __init__(self, max_workers=None, use_processes=False, max_pending=None, memory_limit=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.use_processes = use_processes
+        self.max_pending = max_pending or self.max_workers * 2
+        self.memory_limit = memory_limit
+
+    def map(self, func, items, estimate=None, progress=None):
+        """
+        Generator (index, hasil) berurutan. `estimate(item)` memberi perkiraan
+        byte per item untuk memory_limit, `progress(selesai, total)` dipanggil
+        setiap satu hasil diambil.
+        """
+        items = list(items)
+        total = len(items)
+        pool_cls = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+
+        with pool_cls(max_workers=self.max_workers) as pool:
+            pending = deque()
+            in_flight = 0
+            next_idx = 0
+            done = 0
+
+            while done < total:
+                # Isi antrian selama masih ada slot dan anggaran memori
+                while next_idx < total and len(pending) < self.max_pending:
+                    cost = estimate(items[next_idx]) if estimate else 0
+                    if (self.memory_limit and pending
+                            and in_flight + cost > self.memory_limit):
+                        break
+                    if self.use_processes:
+                        future = pool.submit(func, items[next_idx])
+                    else:
+                        # Konteks (mis. profiler aktif) ikut dibawa ke thread worker
+                        future = pool.submit(contextvars.copy_context().run, func, items[next_idx])
+                    pending.append((next_idx, future, cost))
+                    in_flight += cost
+                    next_idx += 1
+
+                idx, future, cost = pending.popleft()
+                result = future.result()
+                in_flight -= cost
+                done += 1
+                if progress:
+                    progress(done, total)
+                yield idx, result
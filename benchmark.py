@@ -0,0 +1,302 @@
+"""
+Benchmark untuk jalur panas transformasi, decode, dan encode.
+
+Semua gambar dibuat secara sintetis (tanpa file eksternal) sehingga hasilnya
+bisa direproduksi. Untuk setiap kasus dicatat latensi (p50/p90/p99),
+throughput (megapiksel/detik), dan memori puncak (tracemalloc, mencakup
+array NumPy/OpenCV). Hasil disimpan sebagai JSON dan bisa dibandingkan
+dengan hasil commit lain untuk mendeteksi regresi.
+
+Contoh:
+    python benchmark.py --quick -o bench.json
+    python benchmark.py --sizes 24 --channels 3 --cases basic_combined basic_three_pass
+    python benchmark.py -o new.json --compare bench.json --threshold 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from backends import BACKENDS, get_backend, set_backend
+from transform_core import (
+    INTERPOLATIONS, apply_affine_transform, apply_basic_transform, decode_image, display_resized, encode_image
+)
+
+SIZES_MP = (1, 12, 24, 50)
+QUICK_SIZES_MP = (1, 4)
+CHANNELS = (1, 3, 4)
+ANGLES = (30, 90)
+SCALES = (0.5, 2.0)
+
+AFFINE_PTS1 = np.float32([[50, 50], [200, 50], [50, 200]])
+AFFINE_PTS2 = np.float32([[10, 100], [200, 50], [100, 250]])
+
+
+# ========================================================================
+# Gambar sintetis
+# ========================================================================
+def synthetic_image(megapixels, channels, seed=0):
+    """Gambar 4:3 berisi gradien + noise (cukup 'alami' untuk encoder)."""
+    w = int(np.sqrt(megapixels * 1e6 * 4 / 3))
+    h = int(w * 3 / 4)
+    rng = np.random.default_rng(seed)
+    base = np.add.outer(np.linspace(0, 160, h), np.linspace(0, 80, w))
+    layers = [
+        np.clip(base + rng.normal(0, 12, (h, w)) + 10 * c, 0, 255).astype(np.uint8)
+        for c in range(channels)
+    ]
+    return layers[0] if channels == 1 else np.dstack(layers)
+
+
+# ========================================================================
+# Implementasi awal sebagai pembanding
+# ========================================================================
+def three_pass_transform(image, rotation_angle, scale_factor, tx, ty):
+    """
+    Implementasi awal mode basic: resize, warp rotasi, lalu warp translasi,
+    masing-masing satu kali resampling dan satu gambar antara. Referensi
+    untuk kasus basic_three_pass dan test_basic_transform.py.
+    """
+    h, w = image.shape[:2]
+
+    # 1. Scaling Full Image
+    if scale_factor != 1.0:
+        new_w = int(w * scale_factor)
+        new_h = int(h * scale_factor)
+        img = cv2.resize(image, (new_w, new_h))
+    else:
+        img = image.copy()
+
+    h, w = img.shape[:2]
+
+    # 2. Rotation
+    if rotation_angle != 0:
+        center = (w // 2, h // 2)
+        M_rotate = cv2.getRotationMatrix2D(center, rotation_angle, 1.0)
+        cos = np.abs(M_rotate[0, 0])
+        sin = np.abs(M_rotate[0, 1])
+
+        new_w = int((h * sin) + (w * cos))
+        new_h = int((h * cos) + (w * sin))
+
+        M_rotate[0, 2] += (new_w / 2) - center[0]
+        M_rotate[1, 2] += (new_h / 2) - center[1]
+
+        img = cv2.warpAffine(
+            img, M_rotate, (new_w, new_h),
+            borderMode=cv2.BORDER_CONSTANT, borderValue=(255, 255, 255)
+        )
+
+    # 3. Translation
+    if tx != 0 or ty != 0:
+        M_translate = np.float32([[1, 0, tx], [0, 1, ty]])
+        img = cv2.warpAffine(
+            img, M_translate, (img.shape[1], img.shape[0]),
+            borderMode=cv2.BORDER_CONSTANT, borderValue=(255, 255, 255)
+        )
+
+    return img
+
+
+# ========================================================================
+# Pengukuran
+# ========================================================================
+def measure(fn, repeat, warmup=1):
+    """Latensi setiap pemanggilan (detik) dan memori puncak (byte) satu pemanggilan."""
+    for _ in range(warmup):
+        fn()
+
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+
+    # Memori puncak diukur terpisah agar overhead tracemalloc tidak ikut di latensi
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return latencies, peak
+
+
+def summarize(case, megapixels, channels, params, latencies, peak):
+    lat_ms = np.array(latencies) * 1000
+    p50 = float(np.percentile(lat_ms, 50))
+    return {
+        "case": case,
+        "megapixels": megapixels,
+        "channels": channels,
+        "params": params,
+        "repeat": len(latencies),
+        "mean_ms": float(lat_ms.mean()),
+        "p50_ms": p50,
+        "p90_ms": float(np.percentile(lat_ms, 90)),
+        "p99_ms": float(np.percentile(lat_ms, 99)),
+        "mpix_per_s": megapixels / (p50 / 1000) if p50 > 0 else float("inf"),
+        "peak_mb": peak / 2**20,
+    }
+
+
+def build_cases(image, angles, scales):
+    """Daftar (nama kasus, parameter, fungsi) untuk satu gambar sintetis."""
+    h, w = image.shape[:2]
+    cases = []
+
+    # apply_basic_transform: setiap tahap sendiri-sendiri lalu gabungan
+    # (sudut 90 dan translasi bulat memakai jalur salinan piksel tanpa warp)
+    for s in scales:
+        cases.append(("basic_scale", {"scale_factor": s},
+                      lambda s=s: apply_basic_transform(image, 0, s, 0, 0)))
+    for a in angles:
+        cases.append(("basic_rotate", {"rotation_angle": a},
+                      lambda a=a: apply_basic_transform(image, a, 1.0, 0, 0)))
+    cases.append(("basic_translate", {"tx": 25, "ty": 25},
+                  lambda: apply_basic_transform(image, 0, 1.0, 25, 25)))
+    for a in angles:
+        for s in scales:
+            cases.append(("basic_combined", {"rotation_angle": a, "scale_factor": s, "tx": 25, "ty": 25},
+                          lambda a=a, s=s: apply_basic_transform(image, a, s, 25, 25)))
+            # Parameter sama dengan basic_combined, dengan implementasi tiga tahap
+            cases.append(("basic_three_pass", {"rotation_angle": a, "scale_factor": s, "tx": 25, "ty": 25},
+                          lambda a=a, s=s: three_pass_transform(image, a, s, 25, 25)))
+
+    for name in INTERPOLATIONS:
+        cases.append(("basic_interp", {"rotation_angle": 30, "scale_factor": 0.5, "interpolation": name},
+                      lambda name=name: apply_basic_transform(image, 30, 0.5, 0, 0, name)))
+
+    cases.append(("affine", {}, lambda: apply_affine_transform(image, AFFINE_PTS1, AFFINE_PTS2)))
+    cases.append(("display_resized", {"max_width": 350}, lambda: display_resized(image)))
+
+    # Resize ROI seperti pada scale_roi: potongan tengah seperempat gambar
+    roi = image[h // 4: 3 * h // 4, w // 4: 3 * w // 4]
+    for s in scales:
+        size = (int(roi.shape[1] * s), int(roi.shape[0] * s))
+        cases.append(("roi_resize", {"scale_factor": s}, lambda size=size: cv2.resize(roi, size)))
+
+    # Decode (bytes disiapkan di luar pengukuran) dan encode
+    formats = [("png", ".png")] + ([("jpeg", ".jpg")] if image.ndim == 2 or image.shape[2] == 3 else [])
+    for name, ext in formats:
+        ok, buf = cv2.imencode(ext, image)
+        data = buf.tobytes()
+        cases.append((f"decode_{name}", {}, lambda data=data: decode_image(data)))
+    cases.append(("encode_png", {"compression": 3}, lambda: encode_image(image, "PNG", 3)))
+    return cases
+
+
+def run(sizes, channels, angles, scales, repeat, cases=None, log=print):
+    results = []
+    for mp in sizes:
+        for c in channels:
+            image = synthetic_image(mp, c)
+            for case, params, fn in build_cases(image, angles, scales):
+                if cases and case not in cases:
+                    continue
+                latencies, peak = measure(fn, repeat)
+                result = summarize(case, mp, c, params, latencies, peak)
+                results.append(result)
+                log(f"{case:16s} {mp:>3} MP  c={c}  {json.dumps(params):48s} "
+                    f"p50={result['p50_ms']:9.2f} ms  p99={result['p99_ms']:9.2f} ms  "
+                    f"{result['mpix_per_s']:8.1f} MP/s  peak={result['peak_mb']:8.1f} MB")
+            del image
+    return results
+
+
+# ========================================================================
+# Metadata dan perbandingan hasil
+# ========================================================================
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "cv2_threads": cv2.getNumThreads(),
+        "backend": get_backend().name,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def result_key(result):
+    return (result["case"], result["megapixels"], result["channels"],
+            json.dumps(result["params"], sort_keys=True))
+
+
+def compare(results, baseline, threshold):
+    """Kasus yang p50-nya lebih lambat dari baseline melebihi `threshold` (rasio)."""
+    previous = {result_key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None or old["p50_ms"] == 0:
+            continue
+        ratio = result["p50_ms"] / old["p50_ms"]
+        if ratio > 1 + threshold:
+            regressions.append((result, old, ratio))
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark transformasi, decode, dan encode.")
+    parser.add_argument("--quick", action="store_true", help=f"ukuran kecil saja ({QUICK_SIZES_MP} MP)")
+    parser.add_argument("--sizes", type=float, nargs="+", help=f"ukuran gambar dalam MP (default: {SIZES_MP})")
+    parser.add_argument("--channels", type=int, nargs="+", default=list(CHANNELS))
+    parser.add_argument("--angles", type=float, nargs="+", default=list(ANGLES))
+    parser.add_argument("--scales", type=float, nargs="+", default=list(SCALES))
+    parser.add_argument("--backend", choices=["auto"] + list(BACKENDS), default=None,
+                        help="backend resize/warp yang diukur (default: env IMAGE_TRANSFORM_BACKEND atau auto)")
+    parser.add_argument("--cases", nargs="+", help="hanya kasus ini (mis. basic_combined basic_three_pass)")
+    parser.add_argument("--repeat", type=int, default=5, help="jumlah pengukuran per kasus")
+    parser.add_argument("-o", "--output", help="simpan hasil sebagai JSON")
+    parser.add_argument("--compare", help="file JSON hasil sebelumnya sebagai baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="batas perlambatan p50 yang dianggap regresi (default: 0.10 = 10%%)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    sizes = args.sizes or (QUICK_SIZES_MP if args.quick else SIZES_MP)
+    if args.backend:
+        set_backend(args.backend)
+
+    results = run(sizes, args.channels, args.angles, args.scales, args.repeat, args.cases)
+    report = {"environment": environment(), "results": results}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Hasil disimpan ke {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for result, old, ratio in regressions:
+            print(f"REGRESI {result['case']} {result['megapixels']} MP c={result['channels']} "
+                  f"{json.dumps(result['params'])}: {old['p50_ms']:.2f} -> {result['p50_ms']:.2f} ms "
+                  f"({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"Tidak ada regresi dibanding {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+Cache berlapis untuk hasil decode, transformasi, dan encode.
+
+Streamlit menjalankan ulang seluruh script setiap kali slider digeser, jadi
+hasil yang tidak berubah diambil dari cache alih-alih dihitung ulang:
+- decoded : array BGR hasil decode, kunci = hash isi file
+- proxies : piramida mip untuk preview dan proxy RGB untuk cropper ROI, kunci = hash isi file
+            (+ faktor reduksi decode / ukuran proxy)
+- results : array hasil transformasi, kunci = (hash, mode, parameter)
+- encoded : bytes hasil encode untuk download, kunci = (hash, mode, parameter, format)
+- thumbnails : thumbnail JPEG untuk tampilan batch, kunci = (hash, jenis, lebar, parameter)
+- registrations : fitur per file dan matriks affine hasil registrasi per pasangan file
+Setiap lapisan memakai LRU dengan batas ukuran dalam byte.
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from preview import MipPyramid, reduced_pyramid, render_original_preview
+from registration import detect_features, register
+from transform_core import (
+    content_hash, decode_image, decode_reduction, encode_image, image_size, process_single_image,
+    transform_encoded, transform_reduction
+)
+
+
+# ========================================================================
+# Fungsi kunci cache
+# ========================================================================
+def _hashable(value):
+    if isinstance(value, np.ndarray):
+        return (value.shape, value.tobytes())
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(v) for v in value)
+    if isinstance(value, dict):
+        # Operasi pipeline berupa dict
+        return tuple((k, _hashable(value[k])) for k in sorted(value))
+    return value
+
+
+def transform_key(file_hash, transform_mode, **params):
+    """Kunci (hash, mode, parameter) dengan urutan parameter yang stabil."""
+    return (file_hash, transform_mode) + tuple(
+        (name, _hashable(params[name])) for name in sorted(params)
+    )
+
+
+def encode_key(file_hash, transform_mode, output_format, quality, **params):
+    """Kunci hasil encode: kunci transformasi ditambah format dan kualitas."""
+    return transform_key(file_hash, transform_mode, **params) + (output_format, quality)
+
+
+def sizeof(value):
+    """Perkiraan ukuran nilai cache dalam byte."""
+    if hasattr(value, "nbytes"):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(sizeof(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+# ========================================================================
+# LRU cache dengan batas byte
+# ========================================================================
+class LRUCache:
+    """LRU thread-safe yang membuang entri terlama jika melewati max_bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key][0]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        size = sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self.current_bytes -= self._data.pop(key)[1]
+            # Nilai yang lebih besar dari seluruh anggaran tidak disimpan
+            if size > self.max_bytes:
+                return
+            self._data[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, old_size) = self._data.popitem(last=False)
+                self.current_bytes -= old_size
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+
+
+# ========================================================================
+# Cache berlapis untuk pipeline transformasi
+# ========================================================================
+class TransformCache:
+    """
+    Enam lapis LRU (decoded, proxies, results, encoded, thumbnails, registrations).
+    Array yang dikembalikan dipakai bersama antar-rerun, jadi jangan
+    dimodifikasi in-place.
+    """
+
+    def __init__(self, decoded_bytes=512 * 2**20, proxy_bytes=256 * 2**20,
+                 result_bytes=512 * 2**20, encoded_bytes=256 * 2**20, thumbnail_bytes=64 * 2**20,
+                 registration_bytes=64 * 2**20):
+        self.decoded = LRUCache(decoded_bytes)
+        self.proxies = LRUCache(proxy_bytes)
+        self.results = LRUCache(result_bytes)
+        self.encoded = LRUCache(encoded_bytes)
+        self.thumbnails = LRUCache(thumbnail_bytes)
+        self.registrations = LRUCache(registration_bytes)
+
+    def decode(self, data, file_hash=None):
+        """Mengembalikan (hash, array BGR); decode hanya jika belum ada di cache."""
+        file_hash = file_hash or content_hash(data)
+        image = self.decoded.get_or_compute(file_hash, lambda: decode_image(data))
+        return file_hash, image
+
+    def pyramid(self, file_hash, image):
+        """Piramida mip untuk render preview; dibuat sekali per file."""
+        return self.proxies.get_or_compute(file_hash, lambda: MipPyramid(image))
+
+    def preview_pyramid(self, data, file_hash, reduce=1):
+        """
+        Piramida untuk preview. Jika gambar penuh sudah ada di cache decode,
+        piramida dibuat dari sana; selain itu JPEG di-decode tereduksi.
+        """
+        image = self.decoded.get(file_hash)
+        if image is not None or reduce == 1:
+            if image is None:
+                _, image = self.decode(data, file_hash)
+            return self.pyramid(file_hash, image)
+        return self.proxies.get_or_compute((file_hash, reduce), lambda: reduced_pyramid(data, reduce))
+
+    def roi_proxy(self, data, file_hash, max_side=700):
+        """
+        Versi kecil gambar (RGB, sisi terpanjang <= max_side) untuk widget
+        cropper ROI. Dibuat dari piramida preview, jadi gambar penuh tidak
+        perlu dikonversi setiap rerun.
+        """
+        def compute():
+            w, h = image_size(data)
+            width = max(1, int(min(max_side, max_side * w / h)))
+            pyramid = self.preview_pyramid(data, file_hash, decode_reduction(data, width / w))
+            proxy = render_original_preview(pyramid, width, allow_upscale=False)
+            return cv2.cvtColor(proxy, cv2.COLOR_BGR2RGB)
+
+        return self.proxies.get_or_compute(("roi", file_hash, max_side), compute)
+
+    def transform_data(self, file_hash, data, transform_mode, **params):
+        """
+        Hasil transformasi resolusi penuh dari bytes file, selalu sama dengan
+        transform_encoded untuk parameter yang sama. Gambar dari cache decode
+        hanya dipakai jika transform_encoded juga men-decode penuh; jika decode
+        tereduksi dipilih, hasil tidak bergantung pada isi cache decode.
+        """
+        image = self.decoded.get(file_hash)
+        if image is not None and transform_reduction(data, transform_mode, **params) == 1:
+            return self.transform(file_hash, image, transform_mode, **params)
+        key = transform_key(file_hash, transform_mode, **params)
+        return self.results.get_or_compute(key, lambda: transform_encoded(data, transform_mode, **params))
+
+    def transform(self, file_hash, image, transform_mode, **params):
+        key = transform_key(file_hash, transform_mode, **params)
+        return self.results.get_or_compute(
+            key, lambda: process_single_image(image, transform_mode, **params)
+        )
+
+    def encode(self, data, transform_mode, output_format="PNG", quality=None, **params):
+        """
+        Encode hasil transformasi file `data` untuk download. Decode dan
+        transformasi diambil dari cache, hasil encode disimpan (memoized).
+        """
+        file_hash = content_hash(data)
+        key = encode_key(file_hash, transform_mode, output_format, quality, **params)
+        return self.encoded.get_or_compute(key, lambda: encode_image(
+            self.transform_data(file_hash, data, transform_mode, **params), output_format, quality
+        ))
+
+    def cached_encoding(self, file_hash, transform_mode, output_format="PNG", quality=None, **params):
+        """Bytes hasil encode jika sudah pernah dibuat, selain itu None."""
+        key = encode_key(file_hash, transform_mode, output_format, quality, **params)
+        return self.encoded.get(key)
+
+    def thumbnail(self, compute, file_hash, kind, **params):
+        """
+        Thumbnail batch `kind` ("original" atau mode transformasi) untuk file
+        dan parameter tertentu; `compute()` hanya dipanggil jika belum ada.
+        """
+        return self.thumbnails.get_or_compute(transform_key(file_hash, kind, **params), compute)
+
+    def features(self, data, file_hash, detector="ORB"):
+        """Keypoint dan descriptor file (detect_features), dihitung sekali per file dan detektor."""
+        return self.registrations.get_or_compute(
+            ("features", file_hash, detector), lambda: detect_features(data, detector)
+        )
+
+    def registration(self, reference_data, reference_hash, data, file_hash, detector="ORB"):
+        """
+        Hasil registrasi file ke gambar referensi (dict register: matrix,
+        matches, inliers), disimpan per pasangan file agar tidak diestimasi
+        ulang setiap rerun.
+        """
+        return self.registrations.get_or_compute(
+            ("pair", reference_hash, file_hash, detector),
+            lambda: register(
+                self.features(data, file_hash, detector),
+                self.features(reference_data, reference_hash, detector)
+            )
+        )
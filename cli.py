@@ -0,0 +1,257 @@
+"""
+Entry point headless untuk menjalankan transformasi tanpa Streamlit.
+
+Contoh:
+    python cli.py "input/*.jpg" -o output --rotation 30 --scale 0.5
+    python cli.py input/ -o output --mode affine --pts1 50,50,200,50,50,200 --pts2 10,100,200,50,100,250
+    python cli.py input/ -o output --mode affine --points titik.csv
+    python cli.py input/ -o output --mode affine --reference input/ref.jpg --detector ORB
+    python cli.py input/ -o output --mode pipeline --preset preset.yaml
+    python cli.py input/ -o output --rotation 30 --profile-log profile.jsonl --metrics metrics.prom
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from functools import partial
+
+import numpy as np
+
+from backends import BACKENDS, set_backend
+from batch import BatchExecutor
+from pipeline import load_preset, optimize_pipeline
+from profiler import Profiler, profile_item, profiling
+from registration import DETECTORS, detect_features, load_correspondences, transform_file_registered
+from tiled import DEFAULT_TILE_SIZE, transform_file_tiled
+from transform_core import (
+    BASIC_MODE, AFFINE_MODE, PIPELINE_MODE, DEFAULT_INTERPOLATION, INTERPOLATIONS, OUTPUT_FORMATS, content_hash,
+    estimate_affine, transform_file
+)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+TILED_EXTENSIONS = ('.npy',)
+
+
+def find_inputs(sources, extensions=IMAGE_EXTENSIONS):
+    """Mengumpulkan file gambar dari direktori, glob, atau path file."""
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            matches = [os.path.join(source, name) for name in os.listdir(source)]
+        else:
+            matches = glob.glob(source)
+        paths.extend(p for p in matches if p.lower().endswith(extensions))
+    return sorted(set(paths))
+
+
+def parse_points(value):
+    """Parse 'x1,y1,x2,y2,x3,y3' menjadi array float32 3x2."""
+    coords = [float(v) for v in value.split(',')]
+    if len(coords) != 6:
+        raise argparse.ArgumentTypeError("butuh 6 angka: x1,y1,x2,y2,x3,y3")
+    return np.float32(coords).reshape(3, 2)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Transformasi gambar secara batch (headless).")
+    parser.add_argument("inputs", nargs="+", help="direktori, pola glob, atau file gambar")
+    parser.add_argument("-o", "--output", required=True, help="direktori output")
+    parser.add_argument("--mode", choices=["basic", "affine", "pipeline"], default="basic")
+    parser.add_argument("--rotation", type=float, default=0, help="sudut rotasi (derajat)")
+    parser.add_argument("--scale", type=float, default=1.0, help="faktor skala")
+    parser.add_argument("--tx", type=float, default=0, help="translasi X (px)")
+    parser.add_argument("--ty", type=float, default=0, help="translasi Y (px)")
+    parser.add_argument("--pts1", type=parse_points, help="titik source untuk mode affine")
+    parser.add_argument("--pts2", type=parse_points, help="titik destination untuk mode affine")
+    parser.add_argument("--points", help="file korespondensi CSV/JSON (>= 3 pasangan) untuk mode affine, diestimasi dengan RANSAC")
+    parser.add_argument("--reference", help="gambar referensi: setiap input diregistrasi ke gambar ini (mode affine)")
+    parser.add_argument("--detector", choices=list(DETECTORS), default="ORB", help="detektor fitur untuk --reference")
+    parser.add_argument("--preset", help="preset pipeline JSON/YAML untuk mode pipeline")
+    parser.add_argument("--interpolation", choices=list(INTERPOLATIONS), default=None,
+                        help="metode resampling resize/warp (default: dari preset atau Linear; "
+                             "rotasi 90/180/270° dan geseran bulat tanpa interpolasi)")
+    parser.add_argument("--format", choices=list(OUTPUT_FORMATS), default="PNG", help="format output")
+    parser.add_argument("--quality", type=int, default=None,
+                        help="level kompresi PNG (0-9) atau kualitas JPEG/WebP (1-100)")
+    parser.add_argument("--workers", type=int, default=None, help="jumlah worker (default: jumlah core)")
+    parser.add_argument("--chunk-size", type=int, default=1,
+                        help="jumlah file per tugas worker; mengurangi overhead penjadwalan untuk "
+                             "banyak file kecil, hasil sama (default: 1)")
+    parser.add_argument("--tiled", action="store_true",
+                        help="warp bertile untuk gambar sangat besar (input dan output .npy memmap)")
+    parser.add_argument("--tile-size", type=int, default=DEFAULT_TILE_SIZE, help="ukuran tile (px)")
+    parser.add_argument("--backend", choices=["auto"] + list(BACKENDS), default=None,
+                        help="backend resize/warp (default: env IMAGE_TRANSFORM_BACKEND atau auto = kalibrasi)")
+    parser.add_argument("--processes", action="store_true", help="pakai process pool alih-alih thread")
+    parser.add_argument("--overwrite", action="store_true", help="tulis ulang output yang sudah ada")
+    parser.add_argument("--profile-log", help="simpan waktu per tahap per gambar sebagai JSON lines")
+    parser.add_argument("--metrics", help="simpan counter per tahap dalam format teks Prometheus")
+    return parser
+
+
+def profiled(worker, item):
+    """Menjalankan worker dengan semua tahapnya ditandai sebagai milik `item`."""
+    with profile_item(item[0]):
+        return worker(item)
+
+
+def guarded(worker, item):
+    """
+    Worker yang tidak menghentikan batch: gambar yang gagal (file rusak,
+    registrasi gagal, ...) dilaporkan lalu dilewati.
+    """
+    try:
+        return worker(item)
+    except Exception as exc:
+        print(f"\n{item[0]}: {exc}", file=sys.stderr)
+        return None
+
+
+def chunked(worker, items):
+    """Worker untuk --chunk-size: satu tugas pool memproses sekelompok file berurutan."""
+    return [worker(item) for item in items]
+
+
+def output_path(output_dir, src, ext):
+    """
+    Path output untuk `src`: nama file ditambah hash path sumber, agar
+    a.jpg dan a.png (atau file bernama sama dari direktori lain) tidak
+    saling menimpa dan tetap sama saat job dilanjutkan.
+    """
+    stem = os.path.splitext(os.path.basename(src))[0]
+    return os.path.join(output_dir, f"{stem}_{content_hash(os.path.abspath(src).encode())[:8]}{ext}")
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    registering = args.mode == "affine" and args.reference is not None
+    preset_interpolation = None
+    if args.mode == "pipeline":
+        if args.preset is None:
+            print("Mode pipeline membutuhkan --preset", file=sys.stderr)
+            return 2
+        try:
+            with open(args.preset, "rb") as f:
+                preset = load_preset(f.read(), args.preset)
+        except ValueError as exc:
+            print(f"Preset tidak valid: {exc}", file=sys.stderr)
+            return 2
+        ops = optimize_pipeline(preset["ops"])
+        print(f"Pipeline: {len(preset['ops'])} operasi, {len(ops)} setelah optimasi", file=sys.stderr)
+        params = dict(transform_mode=PIPELINE_MODE, pipeline=ops)
+        preset_interpolation = preset["interpolation"]
+    elif registering:
+        if args.tiled:
+            print("--reference tidak bisa digabung dengan --tiled", file=sys.stderr)
+            return 2
+        with open(args.reference, "rb") as f:
+            reference = detect_features(f.read(), args.detector)
+        params = {}
+    elif args.mode == "affine" and args.points is not None:
+        try:
+            with open(args.points, "rb") as f:
+                matrix, inliers = estimate_affine(*load_correspondences(f.read(), args.points))
+        except ValueError as exc:
+            print(f"File korespondensi tidak valid: {exc}", file=sys.stderr)
+            return 2
+        print(f"Matriks affine: {int(inliers.sum())}/{len(inliers)} pasangan inlier", file=sys.stderr)
+        params = dict(transform_mode=AFFINE_MODE, matrix=matrix)
+    elif args.mode == "affine":
+        if args.pts1 is None or args.pts2 is None:
+            print("Mode affine membutuhkan --pts1 dan --pts2, --points, atau --reference", file=sys.stderr)
+            return 2
+        params = dict(transform_mode=AFFINE_MODE, pts1=args.pts1, pts2=args.pts2)
+    else:
+        params = dict(
+            transform_mode=BASIC_MODE,
+            rotation_angle=args.rotation, scale_factor=args.scale, tx=args.tx, ty=args.ty
+        )
+    params["interpolation"] = args.interpolation or preset_interpolation or DEFAULT_INTERPOLATION
+
+    # Dengan --chunk-size > 1 setiap tugas worker memproses sekelompok file berurutan
+    chunked_jobs = args.chunk_size > 1 and not args.tiled
+    if registering:
+        worker = partial(
+            transform_file_registered, reference=reference, detector=args.detector,
+            output_format=args.format, quality=args.quality, **params
+        )
+        extensions, ext = IMAGE_EXTENSIONS, OUTPUT_FORMATS[args.format][0]
+    elif args.tiled:
+        worker = partial(transform_file_tiled, tile_size=args.tile_size, **params)
+        extensions, ext = TILED_EXTENSIONS, ".npy"
+    else:
+        worker = partial(transform_file, output_format=args.format, quality=args.quality, **params)
+        extensions, ext = IMAGE_EXTENSIONS, OUTPUT_FORMATS[args.format][0]
+    if args.backend:
+        try:
+            set_backend(args.backend)
+        except ValueError as exc:
+            print(exc, file=sys.stderr)
+            return 2
+        # Worker --processes memilih backend sendiri lewat environment
+        os.environ["IMAGE_TRANSFORM_BACKEND"] = args.backend
+
+    # Kegagalan dicatat per file, juga di dalam satu kelompok --chunk-size
+    worker = partial(guarded, worker)
+
+    profile = args.profile_log or args.metrics
+    if profile and args.processes:
+        print("--profile-log/--metrics hanya didukung dengan thread (tanpa --processes)", file=sys.stderr)
+        return 2
+    os.makedirs(args.output, exist_ok=True)
+
+    # Output yang sudah ada dilewati agar job bisa dilanjutkan setelah terhenti
+    jobs = []
+    skipped = 0
+    for src in find_inputs(args.inputs, extensions):
+        dst = output_path(args.output, src, ext)
+        if os.path.exists(dst) and not args.overwrite:
+            skipped += 1
+            continue
+        jobs.append((src, dst))
+
+    if not jobs:
+        print(f"Tidak ada gambar untuk diproses ({skipped} dilewati).")
+        return 0
+
+    executor = BatchExecutor(max_workers=args.workers, use_processes=args.processes)
+    items = jobs
+    if chunked_jobs:
+        items = [jobs[i:i + args.chunk_size] for i in range(0, len(jobs), args.chunk_size)]
+
+    def progress(done, total):
+        print(f"\r{done}/{total}", end="", file=sys.stderr, flush=True)
+
+    profiler = Profiler() if profile else None
+    if profiler is not None:
+        worker = partial(profiled, worker)
+    if chunked_jobs:
+        worker = partial(chunked, worker)
+
+    start = time.perf_counter()
+    failed = 0
+    with profiling(profiler):
+        for _, result in executor.map(worker, items, progress=progress):
+            failed += result.count(None) if chunked_jobs else result is None
+    elapsed = time.perf_counter() - start
+    print(file=sys.stderr)
+
+    processed = len(jobs) - failed
+    print(f"{processed} gambar diproses, {skipped} dilewati, "
+          + (f"{failed} gagal, " if failed else "")
+          + f"{elapsed:.2f} s ({processed / elapsed:.1f} gambar/detik)")
+
+    if args.profile_log:
+        with open(args.profile_log, "w") as f:
+            f.writelines(line + "\n" for line in profiler.log_lines())
+    if args.metrics:
+        with open(args.metrics, "w") as f:
+            f.write(profiler.prometheus())
+    # Status 1 jika ada gambar gagal, agar cron/worker bisa mendeteksinya
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,431 @@
+"""
+Layanan watch-folder: gambar yang disalin ke sebuah direktori ditransformasi
+otomatis, tanpa upload lewat UI.
+
+Direktori dipindai berkala (polling); jika paket `watchdog` terpasang, event
+inotify/FSEvents membangunkan pemindaian lebih awal. File baru diproses setelah
+tidak berubah selama beberapa saat, di-dedupe berdasarkan hash isi, lalu dikirim
+ke worker pool.
+Status per file (queued/running/done/failed) dan lokasi output disimpan di
+SQLite, sehingga setelah restart job yang sudah selesai tidak diproses ulang
+dan job yang terputus dilanjutkan.
+
+Contoh:
+    python ingest.py watch inbox/ -o outbox --rotation 90 --db jobs.sqlite
+    python ingest.py watch inbox/ -o outbox --preset preset.yaml --format JPEG
+    python ingest.py status --db jobs.sqlite
+"""
+import argparse
+import json
+import os
+import signal
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline import load_preset, optimize_pipeline
+from transform_core import (
+    BASIC_MODE, PIPELINE_MODE, DEFAULT_INTERPOLATION, INTERPOLATIONS, OUTPUT_FORMATS, content_hash,
+    transform_encoded, write_output
+)
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog opsional; tanpa itu cukup polling
+    Observer = None
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+DEFAULT_DB = "jobs.sqlite"
+
+# Interval pemindaian direktori (detik)
+POLL_INTERVAL = 2.0
+
+# File dianggap selesai disalin jika ukuran/mtime tidak berubah selama ini (detik)
+SETTLE_SECONDS = 1.0
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+
+# ========================================================================
+# Penyimpanan status job (SQLite)
+# ========================================================================
+class JobStore:
+    """
+    Status job per (hash isi file, profil transformasi) di SQLite. Profil
+    berbeda (parameter lain) berarti file yang sama diproses lagi. Aman
+    dipakai dari banyak thread.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            file_hash TEXT NOT NULL,
+            profile   TEXT NOT NULL,
+            source    TEXT NOT NULL,
+            status    TEXT NOT NULL,
+            output    TEXT,
+            error     TEXT,
+            attempts  INTEGER NOT NULL DEFAULT 0,
+            created   REAL NOT NULL,
+            started   REAL,
+            finished  REAL,
+            PRIMARY KEY (file_hash, profile)
+        );
+        CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+        CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished);
+    """
+
+    def __init__(self, path=DEFAULT_DB):
+        # Autocommit: setiap perubahan status langsung tersimpan
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+
+    def _execute(self, sql, args=()):
+        with self._lock:
+            cursor = self._conn.execute(sql, args)
+            return cursor.rowcount, cursor.fetchall()
+
+    def enqueue(self, file_hash, profile, source):
+        """Mendaftarkan job baru; False jika file dengan isi sama sudah pernah tercatat."""
+        count, _ = self._execute(
+            "INSERT OR IGNORE INTO jobs (file_hash, profile, source, status, created) "
+            "VALUES (?, ?, ?, 'queued', ?)",
+            (file_hash, profile, source, time.time())
+        )
+        return count == 1
+
+    def start(self, file_hash, profile):
+        self._execute(
+            "UPDATE jobs SET status = 'running', started = ?, attempts = attempts + 1, error = NULL "
+            "WHERE file_hash = ? AND profile = ?",
+            (time.time(), file_hash, profile)
+        )
+
+    def finish(self, file_hash, profile, output):
+        self._execute(
+            "UPDATE jobs SET status = 'done', output = ?, finished = ? WHERE file_hash = ? AND profile = ?",
+            (output, time.time(), file_hash, profile)
+        )
+
+    def fail(self, file_hash, profile, error):
+        self._execute(
+            "UPDATE jobs SET status = 'failed', error = ?, finished = ? WHERE file_hash = ? AND profile = ?",
+            (error, time.time(), file_hash, profile)
+        )
+
+    def requeue(self, profile, failed=False):
+        """
+        Mengembalikan job yang terputus (running saat proses berhenti), dan
+        jika `failed` juga job yang gagal, ke antrian. Mengembalikan jumlahnya.
+        """
+        statuses = ("running", "failed") if failed else ("running",)
+        count, _ = self._execute(
+            f"UPDATE jobs SET status = 'queued' WHERE profile = ? "
+            f"AND status IN ({', '.join('?' * len(statuses))})",
+            (profile,) + statuses
+        )
+        return count
+
+    def queued(self, profile):
+        """Job yang menunggu diproses (hash, path sumber), terlama dulu."""
+        _, rows = self._execute(
+            "SELECT file_hash, source FROM jobs WHERE profile = ? AND status = 'queued' ORDER BY created",
+            (profile,)
+        )
+        return rows
+
+    def stats(self, window=3600):
+        """
+        Ringkasan antrian: jumlah job per status, backlog, serta throughput dan
+        rata-rata durasi job yang selesai dalam `window` detik terakhir.
+        """
+        _, rows = self._execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        counts.update(rows)
+        _, [(done, mean_s)] = self._execute(
+            "SELECT COUNT(*), AVG(finished - started) FROM jobs WHERE status = 'done' AND finished >= ?",
+            (time.time() - window,)
+        )
+        return {
+            "counts": counts,
+            "backlog": counts["queued"] + counts["running"],
+            "window_s": window,
+            "done_in_window": done,
+            "per_minute": done / (window / 60),
+            "mean_s": mean_s,
+        }
+
+    def recent(self, limit=10, status=None):
+        """Job terakhir yang selesai atau gagal, terbaru dulu."""
+        where = "WHERE status = ?" if status else "WHERE finished IS NOT NULL"
+        _, rows = self._execute(
+            f"SELECT source, status, output, error, finished FROM jobs {where} ORDER BY finished DESC LIMIT ?",
+            ((status,) if status else ()) + (limit,)
+        )
+        return [dict(zip(("source", "status", "output", "error", "finished"), row)) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ========================================================================
+# Watch-folder
+# ========================================================================
+def profile_key(transform_mode, output_format, quality, **params):
+    """Hash parameter transformasi + format output; bagian dari kunci dedupe job."""
+    spec = dict(params, transform_mode=transform_mode, format=output_format, quality=quality)
+    text = json.dumps(spec, sort_keys=True, default=lambda v: v.tolist() if hasattr(v, "tolist") else str(v))
+    return content_hash(text.encode())[:12]
+
+
+class FolderWatcher:
+    """
+    Memindai `input_dir`, mendaftarkan file baru ke JobStore, dan memproses
+    antrian dengan thread pool. Job yang sedang berjalan/menunggu di pool
+    dibatasi 2 x jumlah worker; pemindaian menunggu jika antrian penuh.
+    """
+
+    def __init__(self, input_dir, output_dir, store, transform_mode, output_format="PNG", quality=None,
+                 workers=None, poll_interval=POLL_INTERVAL, settle=SETTLE_SECONDS, **params):
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.store = store
+        self.transform_mode = transform_mode
+        self.output_format = output_format
+        self.quality = quality
+        self.params = params
+        self.profile = profile_key(transform_mode, output_format, quality, **params)
+        self.poll_interval = poll_interval
+        self.settle = settle
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        self._slots = threading.Semaphore(self.workers * 2)
+        self._wake = threading.Event()
+        # path -> (ukuran, mtime) file yang sudah didaftarkan
+        self._known = {}
+
+    def output_path(self, source, file_hash):
+        """Nama output memuat potongan hash agar upload bernama sama tidak saling menimpa."""
+        stem = os.path.splitext(os.path.basename(source))[0]
+        return os.path.join(self.output_dir, f"{stem}_{file_hash[:8]}{OUTPUT_FORMATS[self.output_format][0]}")
+
+    def process(self, file_hash, source):
+        """Worker: transformasi satu file dan catat hasilnya di JobStore."""
+        try:
+            self.store.start(file_hash, self.profile)
+            with open(source, "rb") as f:
+                data = f.read()
+            dst = self.output_path(source, file_hash)
+            write_output(dst, transform_encoded(data, self.transform_mode, **self.params),
+                         self.output_format, self.quality)
+            self.store.finish(file_hash, self.profile, dst)
+        except Exception as exc:
+            self.store.fail(file_hash, self.profile, f"{type(exc).__name__}: {exc}")
+            print(f"Gagal: {source} ({exc})", file=sys.stderr)
+        finally:
+            self._slots.release()
+
+    def submit(self, file_hash, source):
+        self._slots.acquire()
+        self._pool.submit(self.process, file_hash, source)
+
+    def stable_files(self):
+        """
+        File gambar baru/berubah yang tidak dimodifikasi selama `settle` detik
+        (salinan sudah selesai). File yang sudah didaftarkan dengan ukuran dan
+        mtime yang sama tidak di-hash ulang.
+        """
+        now = time.time()
+        ready = []
+        known = {}
+        with os.scandir(self.input_dir) as entries:
+            for entry in entries:
+                if not entry.is_file() or not entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                stat = entry.stat()
+                signature = (stat.st_size, stat.st_mtime_ns)
+                if self._known.get(entry.path) == signature:
+                    known[entry.path] = signature
+                elif now - stat.st_mtime >= self.settle:
+                    known[entry.path] = signature
+                    ready.append(entry.path)
+        # File yang sudah dihapus dari direktori dilupakan
+        self._known = known
+        return sorted(ready)
+
+    def scan(self):
+        """Mendaftarkan file baru ke JobStore (dedupe per hash isi) dan mengantrikan prosesnya."""
+        queued = 0
+        for path in self.stable_files():
+            try:
+                with open(path, "rb") as f:
+                    file_hash = content_hash(f.read())
+            except OSError:
+                continue  # dihapus/dipindah di antara pemindaian dan pembacaan
+            if self.store.enqueue(file_hash, self.profile, path):
+                self.submit(file_hash, path)
+                queued += 1
+        return queued
+
+    def resume(self, retry_failed=False):
+        """Setelah restart: job yang terputus (dan opsional yang gagal) dijalankan lagi."""
+        self.store.requeue(self.profile, failed=retry_failed)
+        resumed = 0
+        for file_hash, source in self.store.queued(self.profile):
+            if os.path.exists(source):
+                self.submit(file_hash, source)
+                resumed += 1
+            else:
+                self.store.fail(file_hash, self.profile, "File sumber sudah tidak ada")
+        return resumed
+
+    def _observe(self):
+        """Observer watchdog yang membangunkan pemindaian saat ada event file (None jika tidak tersedia)."""
+        if Observer is None:
+            return None
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                watcher._wake.set()
+
+        observer = Observer()
+        observer.schedule(Handler(), self.input_dir, recursive=False)
+        observer.start()
+        return observer
+
+    def run(self, stop, retry_failed=False):
+        """Loop utama sampai `stop` (threading.Event) diset; job yang sedang berjalan ditunggu selesai."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        resumed = self.resume(retry_failed)
+        observer = self._observe()
+        mode = "inotify/watchdog + polling" if observer else "polling"
+        print(f"Memantau {self.input_dir} ({mode}, profil {self.profile}, {resumed} job dilanjutkan)",
+              file=sys.stderr)
+        try:
+            while not stop.is_set():
+                queued = self.scan()
+                if queued:
+                    print(f"{queued} file baru diantrikan", file=sys.stderr)
+                # Event file membangunkan lebih awal; `settle` tetap ditunggu di pemindaian berikutnya
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+            self._pool.shutdown(wait=True)
+
+
+# ========================================================================
+# Entry point
+# ========================================================================
+def build_parser():
+    parser = argparse.ArgumentParser(description="Layanan watch-folder untuk transformasi gambar otomatis.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    watch = commands.add_parser("watch", help="pantau direktori dan proses gambar baru")
+    watch.add_argument("input", help="direktori yang dipantau")
+    watch.add_argument("-o", "--output", required=True, help="direktori output")
+    watch.add_argument("--db", default=DEFAULT_DB, help="file SQLite status job")
+    watch.add_argument("--preset", help="preset pipeline JSON/YAML (selain itu mode basic)")
+    watch.add_argument("--rotation", type=float, default=0, help="sudut rotasi (derajat)")
+    watch.add_argument("--scale", type=float, default=1.0, help="faktor skala")
+    watch.add_argument("--tx", type=float, default=0, help="translasi X (px)")
+    watch.add_argument("--ty", type=float, default=0, help="translasi Y (px)")
+    watch.add_argument("--interpolation", choices=list(INTERPOLATIONS), default=None,
+                       help="metode resampling (default: dari preset atau Linear)")
+    watch.add_argument("--format", choices=list(OUTPUT_FORMATS), default="PNG", help="format output")
+    watch.add_argument("--quality", type=int, default=None,
+                       help="level kompresi PNG (0-9) atau kualitas JPEG/WebP (1-100)")
+    watch.add_argument("--workers", type=int, default=None, help="jumlah worker (default: jumlah core)")
+    watch.add_argument("--poll-interval", type=float, default=POLL_INTERVAL, help="interval pemindaian (detik)")
+    watch.add_argument("--settle", type=float, default=SETTLE_SECONDS,
+                       help="lama file harus tidak berubah sebelum diproses (detik)")
+    watch.add_argument("--retry-failed", action="store_true", help="antrikan ulang job yang gagal saat mulai")
+
+    status = commands.add_parser("status", help="tampilkan antrian, throughput, dan job terakhir")
+    status.add_argument("--db", default=DEFAULT_DB, help="file SQLite status job")
+    status.add_argument("--window", type=float, default=3600, help="jendela throughput (detik)")
+    status.add_argument("--json", action="store_true", help="output JSON")
+    return parser
+
+
+def watch(args):
+    if not os.path.isdir(args.input):
+        print(f"Direktori tidak ditemukan: {args.input}", file=sys.stderr)
+        return 2
+
+    preset_interpolation = None
+    if args.preset:
+        try:
+            with open(args.preset, "rb") as f:
+                preset = load_preset(f.read(), args.preset)
+        except ValueError as exc:
+            print(f"Preset tidak valid: {exc}", file=sys.stderr)
+            return 2
+        params = dict(transform_mode=PIPELINE_MODE, pipeline=optimize_pipeline(preset["ops"]))
+        preset_interpolation = preset["interpolation"]
+    else:
+        params = dict(
+            transform_mode=BASIC_MODE,
+            rotation_angle=args.rotation, scale_factor=args.scale, tx=args.tx, ty=args.ty
+        )
+    params["interpolation"] = args.interpolation or preset_interpolation or DEFAULT_INTERPOLATION
+
+    store = JobStore(args.db)
+    watcher = FolderWatcher(
+        args.input, args.output, store, output_format=args.format, quality=args.quality,
+        workers=args.workers, poll_interval=args.poll_interval, settle=args.settle, **params
+    )
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        watcher.run(stop, retry_failed=args.retry_failed)
+    except KeyboardInterrupt:
+        stop.set()
+    finally:
+        store.close()
+    return 0
+
+
+def status(args):
+    if not os.path.exists(args.db):
+        print(f"Database job tidak ditemukan: {args.db}", file=sys.stderr)
+        return 2
+    store = JobStore(args.db)
+    try:
+        stats = store.stats(args.window)
+        failed = store.recent(status="failed")
+    finally:
+        store.close()
+
+    if args.json:
+        print(json.dumps(dict(stats, failed=failed), indent=2))
+        return 0
+
+    counts = stats["counts"]
+    print(" | ".join(f"{name}: {counts[name]}" for name in JOB_STATUSES) + f" | backlog: {stats['backlog']}")
+    mean = f", rata-rata {stats['mean_s']:.2f} s/file" if stats["mean_s"] is not None else ""
+    print(f"{stats['done_in_window']} selesai dalam {stats['window_s'] / 60:.0f} menit terakhir "
+          f"({stats['per_minute']:.1f} file/menit{mean})")
+    for job in failed:
+        print(f"  gagal: {job['source']}: {job['error']}")
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return watch(args) if args.command == "watch" else status(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
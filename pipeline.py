@@ -0,0 +1,266 @@
+"""
+Pipeline transformasi deklaratif dan preset JSON/YAML.
+
+Pipeline adalah daftar operasi geometri yang dijalankan berurutan, misalnya:
+
+    {"name": "thumbnail miring", "interpolation": "Area", "ops": [
+        {"op": "crop", "box": [0.1, 0.1, 0.9, 0.9]},
+        {"op": "scale", "factor": 0.5},
+        {"op": "rotate", "angle": 15},
+        {"op": "flip", "axis": "horizontal"}
+    ]}
+
+Sebelum dieksekusi, optimize_pipeline membuang operasi tanpa efek dan
+menggabungkan operasi berurutan yang bisa digabung tanpa mengubah hasil.
+Seluruh rantai lalu dilipat menjadi satu matriks (transform_core.pipeline_matrix)
+sehingga berapa pun panjang rantainya, gambar hanya di-warp satu kali. Preset
+yang sama dipakai di UI, batch, dan CLI (mode PIPELINE_MODE).
+"""
+import json
+import numbers
+
+import numpy as np
+
+from transform_core import INTERPOLATIONS, pipeline_execution, pipeline_matrix
+
+try:
+    import yaml
+except ImportError:  # PyYAML opsional, hanya untuk preset .yaml/.yml
+    yaml = None
+
+# Parameter yang diterima setiap operasi beserta nilai default-nya
+OP_PARAMS = {
+    "scale": {"factor": 1.0, "fx": None, "fy": None},
+    "rotate": {"angle": 0.0, "expand": True},
+    "translate": {"tx": 0.0, "ty": 0.0},
+    "flip": {"axis": "horizontal"},
+    "crop": {"box": [0.0, 0.0, 1.0, 1.0]},
+    "affine": {"pts1": None, "pts2": None, "matrix": None, "size": None},
+}
+
+FLIP_AXES = ("horizontal", "vertical", "both")
+
+PRESET_FORMATS = {
+    # nama: (ekstensi, mime)
+    "JSON": (".json", "application/json"),
+}
+if yaml is not None:
+    PRESET_FORMATS["YAML"] = (".yaml", "application/x-yaml")
+
+# Contoh pipeline untuk editor di UI
+EXAMPLE_PIPELINE = [
+    {"op": "crop", "box": [0.1, 0.1, 0.9, 0.9]},
+    {"op": "scale", "factor": 0.5},
+    {"op": "rotate", "angle": 15},
+    {"op": "flip", "axis": "horizontal"},
+]
+
+
+# ========================================================================
+# Validasi spesifikasi
+# ========================================================================
+def _number(op, name, value):
+    if not isinstance(value, numbers.Real) or isinstance(value, bool):
+        raise ValueError(f"Parameter {name} pada operasi {op} harus berupa angka")
+    return float(value)
+
+
+def _points(op, name, value, shape):
+    """Daftar angka dengan bentuk `shape` (-1 untuk jumlah baris bebas) sebagai list biasa."""
+    try:
+        points = np.asarray(value, dtype=np.float64).reshape(shape)
+    except (TypeError, ValueError):
+        count = "x".join("N" if n < 0 else str(n) for n in shape)
+        raise ValueError(f"Parameter {name} pada operasi {op} harus berupa {count} angka")
+    return points.tolist()
+
+
+def parse_op(spec):
+    """Memvalidasi satu operasi dan melengkapinya dengan nilai default."""
+    if not isinstance(spec, dict) or spec.get("op") not in OP_PARAMS:
+        raise ValueError(f"Operasi tidak dikenal: {spec!r} (pilihan: {', '.join(OP_PARAMS)})")
+    name = spec["op"]
+    unknown = set(spec) - set(OP_PARAMS[name]) - {"op"}
+    if unknown:
+        raise ValueError(f"Parameter tidak dikenal pada operasi {name}: {', '.join(sorted(unknown))}")
+
+    op = dict({"op": name}, **OP_PARAMS[name])
+    op.update(spec)
+    if name == "scale":
+        for key in ("factor", "fx", "fy"):
+            if op[key] is not None:
+                op[key] = _number(name, key, op[key])
+                if op[key] <= 0:
+                    raise ValueError(f"Parameter {key} pada operasi scale harus > 0")
+    elif name == "rotate":
+        op["angle"] = _number(name, "angle", op["angle"])
+        op["expand"] = bool(op["expand"])
+    elif name == "translate":
+        op["tx"], op["ty"] = _number(name, "tx", op["tx"]), _number(name, "ty", op["ty"])
+    elif name == "flip":
+        if op["axis"] not in FLIP_AXES:
+            raise ValueError(f"Sumbu flip harus salah satu dari: {', '.join(FLIP_AXES)}")
+    elif name == "crop":
+        x0, y0, x1, y1 = op["box"] = _points(name, "box", op["box"], (4,))
+        if not (0 <= x0 < x1 <= 1 and 0 <= y0 < y1 <= 1):
+            raise ValueError("Kotak crop harus relatif (0-1) dengan x0 < x1 dan y0 < y1")
+    elif name == "affine":
+        if op["matrix"] is not None:
+            op["matrix"] = _points(name, "matrix", op["matrix"], (2, 3))
+        elif op["pts1"] is not None and op["pts2"] is not None:
+            op["pts1"] = _points(name, "pts1", op["pts1"], (-1, 2))
+            op["pts2"] = _points(name, "pts2", op["pts2"], (-1, 2))
+            if len(op["pts1"]) != len(op["pts2"]) or len(op["pts1"]) < 3:
+                raise ValueError("Operasi affine membutuhkan minimal 3 pasangan titik dengan jumlah yang sama")
+        else:
+            raise ValueError("Operasi affine membutuhkan matrix atau pts1 dan pts2")
+        if op["size"] is not None:
+            op["size"] = [int(v) for v in _points(name, "size", op["size"], (2,))]
+    # Parameter yang tetap default tidak disimpan agar preset dan kunci cache ringkas
+    return {key: value for key, value in op.items()
+            if key == "op" or value != OP_PARAMS[name].get(key)}
+
+
+def parse_pipeline(spec):
+    """
+    Memvalidasi spesifikasi pipeline: daftar operasi, atau dict preset dengan
+    kunci "ops". Mengembalikan daftar operasi yang sudah dinormalisasi.
+    ValueError jika ada operasi atau parameter yang tidak valid.
+    """
+    ops = spec.get("ops") if isinstance(spec, dict) else spec
+    if not isinstance(ops, list):
+        raise ValueError("Pipeline harus berupa daftar operasi atau preset dengan kunci \"ops\"")
+    return [parse_op(op) for op in ops]
+
+
+# ========================================================================
+# Optimasi rantai operasi
+# ========================================================================
+def is_noop(op):
+    """Operasi yang tidak mengubah gambar maupun ukuran kanvas."""
+    name = op["op"]
+    if name == "scale":
+        factor = op.get("factor", 1.0)
+        return op.get("fx", factor) == 1 and op.get("fy", factor) == 1
+    if name == "rotate":
+        return op.get("angle", 0) % 360 == 0
+    if name == "translate":
+        return op.get("tx", 0) == 0 and op.get("ty", 0) == 0
+    if name == "crop":
+        return list(op.get("box", [0, 0, 1, 1])) == [0, 0, 1, 1]
+    if name == "affine":
+        return op.get("size") is None and op.get("matrix") == [[1, 0, 0], [0, 1, 0]]
+    return False
+
+
+def _merge(a, b):
+    """
+    Pengganti dua operasi berurutan (daftar, bisa kosong jika saling
+    meniadakan) jika hasilnya identik, selain itu None.
+    """
+    if a["op"] != b["op"]:
+        return None
+    if a["op"] == "translate":
+        return [{"op": "translate", "tx": a.get("tx", 0) + b.get("tx", 0), "ty": a.get("ty", 0) + b.get("ty", 0)}]
+    if a["op"] == "rotate" and not a.get("expand", True) and not b.get("expand", True):
+        # Kanvas dan pusat rotasi sama, jadi sudutnya bisa dijumlahkan
+        return [{"op": "rotate", "angle": a.get("angle", 0) + b.get("angle", 0), "expand": False}]
+    if a["op"] == "flip":
+        axes = {"horizontal": {"h"}, "vertical": {"v"}, "both": {"h", "v"}}
+        flipped = axes[a.get("axis", "horizontal")] ^ axes[b.get("axis", "horizontal")]
+        if not flipped:
+            return []
+        axis = "both" if len(flipped) == 2 else ("horizontal" if "h" in flipped else "vertical")
+        return [{"op": "flip", "axis": axis}]
+    # Scale berurutan tidak digabung: pembulatan ukuran kanvas per tahap bisa berbeda
+    return None
+
+
+def optimize_pipeline(ops):
+    """
+    Membuang operasi tanpa efek dan menggabungkan operasi berurutan yang
+    setara (translasi, rotasi tanpa expand, flip). Hasil eksekusinya sama
+    dengan pipeline asli; sisanya dilipat menjadi satu matriks saat dijalankan.
+    """
+    optimized = []
+    for op in ops:
+        if is_noop(op):
+            continue
+        merged = _merge(optimized[-1], op) if optimized else None
+        if merged is None:
+            optimized.append(op)
+            continue
+        optimized.pop()
+        optimized.extend(op for op in merged if not is_noop(op))
+    return optimized
+
+
+def pipeline_plan(ops, shape):
+    """
+    Ringkasan eksekusi pipeline untuk gambar berukuran `shape`: jumlah operasi
+    sebelum/sesudah optimasi, cara eksekusi (lihat pipeline_execution),
+    matriks gabungan, dan ukuran output.
+    """
+    optimized = optimize_pipeline(ops)
+    M, size = pipeline_matrix(shape, optimized)
+    return {
+        "ops": len(ops),
+        "optimized_ops": len(optimized),
+        "execution": pipeline_execution(M, size, shape),
+        "matrix": M,
+        "size": size,
+    }
+
+
+# ========================================================================
+# Preset JSON / YAML
+# ========================================================================
+def load_preset(data, filename=""):
+    """
+    Membaca preset dari bytes/teks JSON atau YAML. Mengembalikan dict dengan
+    `name`, `interpolation` (None jika tidak diatur), dan `ops` yang sudah
+    divalidasi. ValueError jika isi preset tidak valid.
+    """
+    text = data.decode("utf-8-sig") if isinstance(data, bytes) else data
+    if filename.lower().endswith((".yaml", ".yml")):
+        if yaml is None:
+            raise ValueError("Preset YAML membutuhkan PyYAML (pip install pyyaml)")
+        try:
+            spec = yaml.safe_load(text)
+        except yaml.YAMLError as exc:
+            raise ValueError(f"YAML tidak valid: {exc}")
+    else:
+        try:
+            spec = json.loads(text)
+        except json.JSONDecodeError as exc:
+            if yaml is None:
+                raise ValueError(f"JSON tidak valid: {exc}")
+            # Teks tanpa nama file (mis. dari text area) boleh berupa YAML
+            try:
+                spec = yaml.safe_load(text)
+            except yaml.YAMLError:
+                raise ValueError(f"JSON tidak valid: {exc}")
+
+    interpolation = spec.get("interpolation") if isinstance(spec, dict) else None
+    if interpolation is not None and interpolation not in INTERPOLATIONS:
+        raise ValueError(f"Interpolasi tidak dikenal: {interpolation}")
+    return {
+        "name": spec.get("name") if isinstance(spec, dict) else None,
+        "interpolation": interpolation,
+        "ops": parse_pipeline(spec),
+    }
+
+
+def dump_preset(ops, interpolation=None, name=None, preset_format="JSON"):
+    """Menyimpan pipeline sebagai teks preset JSON atau YAML."""
+    preset = {}
+    if name:
+        preset["name"] = name
+    if interpolation:
+        preset["interpolation"] = interpolation
+    preset["ops"] = list(ops)
+    if preset_format == "YAML":
+        if yaml is None:
+            raise ValueError("Preset YAML membutuhkan PyYAML (pip install pyyaml)")
+        return yaml.safe_dump(preset, sort_keys=False, allow_unicode=True, default_flow_style=None)
+    return json.dumps(preset, indent=2, ensure_ascii=False)
@@ -0,0 +1,220 @@
+"""
+Render preview pada resolusi tampilan.
+
+Saat slider digeser, hasil hanya ditampilkan beberapa ratus piksel lebar,
+jadi transformasi tidak perlu dijalankan pada resolusi penuh. Gambar sumber
+diperkecil sekali menjadi piramida mip (1/2, 1/4, ...), lalu level terkecil
+yang masih cukup tajam di-warp langsung ke ukuran preview dengan matriks
+yang disesuaikan. Render resolusi penuh hanya dilakukan untuk download.
+"""
+import cv2
+
+from profiler import stage, timed
+from transform_core import (
+    content_hash, decode_image, decode_reduction, display_resized, encode_image, image_size,
+    interpolation_flag, max_stretch, pixel_scale_matrix, scale_roi_box, transform_matrix
+)
+
+# Level mip terkecil yang masih disimpan (sisi terpendek, piksel)
+MIN_LEVEL_SIZE = 64
+
+# Thumbnail batch dikirim ke browser sebagai JPEG (jauh lebih kecil dari PNG array mentah)
+THUMBNAIL_FORMAT = ("JPEG", 85)
+
+
+# ========================================================================
+# Piramida mip
+# ========================================================================
+class MipPyramid:
+    """
+    Gambar sumber beserta versi 1/2, 1/4, ... (dibuat sekali, INTER_AREA).
+    `full_shape` diisi jika level 0 sudah di-decode tereduksi, agar matriks
+    tetap dihitung terhadap ukuran asli gambar.
+    """
+
+    def __init__(self, image, full_shape=None, owns_base=False):
+        self.full_shape = tuple(full_shape) if full_shape is not None else image.shape
+        self.owns_base = owns_base
+        self.levels = [image]
+        with stage("mip_pyramid") as s:
+            while min(self.levels[-1].shape[:2]) // 2 >= MIN_LEVEL_SIZE:
+                prev = self.levels[-1]
+                h, w = prev.shape[:2]
+                self.levels.append(cv2.resize(prev, (w // 2, h // 2), interpolation=cv2.INTER_AREA))
+            s.output(self)
+
+    @property
+    def shape(self):
+        return self.full_shape
+
+    @property
+    def nbytes(self):
+        # Level 0 hasil decode penuh sudah dihitung di cache decode
+        levels = self.levels if self.owns_base else self.levels[1:]
+        return sum(level.nbytes for level in levels)
+
+    def level_for(self, scale):
+        """Level terkecil yang resolusinya masih >= `scale` x resolusi asli."""
+        level = self.levels[0]
+        for candidate in self.levels[1:]:
+            if candidate.shape[1] / self.shape[1] < scale:
+                break
+            level = candidate
+        return level
+
+
+# ========================================================================
+# Render preview
+# ========================================================================
+def preview_size(full_size, max_width, allow_upscale=True):
+    """Faktor skala dan ukuran preview untuk output berukuran `full_size`."""
+    w, h = full_size
+    scale = max_width / w
+    if not allow_upscale:
+        scale = min(scale, 1.0)
+    return scale, (max(1, int(w * scale)), max(1, int(h * scale)))
+
+
+def preview_scale(shape, transform_mode, max_width=350, allow_upscale=True, **params):
+    """
+    Resolusi sumber (relatif terhadap resolusi asli) yang cukup untuk preview
+    gambar asli maupun hasil transformasi.
+    """
+    h, w = shape[:2]
+    original_scale, _ = preview_size((w, h), max_width, allow_upscale)
+    M, full_size = transform_matrix(shape, transform_mode, **params)
+    scale, _ = preview_size(full_size, max_width, allow_upscale)
+    return max(original_scale, scale * max_stretch(M))
+
+
+def render_preview(pyramid, transform_mode, max_width=350, allow_upscale=True, **params):
+    """
+    Hasil transformasi pada resolusi preview dengan satu kali warp dari level
+    mip yang sesuai. Mengembalikan (preview, ukuran output resolusi penuh).
+    """
+    M, full_size = transform_matrix(pyramid.shape, transform_mode, **params)
+    scale, dsize = preview_size(full_size, max_width, allow_upscale)
+
+    # Resolusi sumber yang dibutuhkan = skala preview x pembesaran transformasi
+    source = pyramid.level_for(scale * max_stretch(M))
+
+    # proxy -> sumber penuh -> output penuh -> preview
+    h, w = pyramid.shape[:2]
+    h_p, w_p = source.shape[:2]
+    M_preview = (
+        pixel_scale_matrix(scale, scale)
+        @ M
+        @ pixel_scale_matrix(w / w_p, h / h_p)
+    )
+
+    preview = timed(
+        "preview_warp", cv2.warpAffine,
+        source, M_preview[:2], dsize,
+        flags=interpolation_flag(params.get('interpolation'), max_stretch(M_preview)),
+        borderMode=cv2.BORDER_CONSTANT, borderValue=(255, 255, 255)
+    )
+    return preview, full_size
+
+
+def reduced_pyramid(data, reduce=1):
+    """Piramida mip dari decode tereduksi, dengan ukuran asli dari header."""
+    image = decode_image(data, reduce)
+    if reduce == 1:
+        return MipPyramid(image, owns_base=True)
+    w, h = image_size(data)
+    return MipPyramid(image, full_shape=(h, w) + image.shape[2:], owns_base=True)
+
+
+def render_original_preview(pyramid, max_width=350, allow_upscale=True):
+    """Preview gambar asli dari level mip yang sesuai."""
+    h, w = pyramid.shape[:2]
+    scale, dsize = preview_size((w, h), max_width, allow_upscale)
+    return timed("preview_resize", cv2.resize, pyramid.level_for(scale), dsize, interpolation=cv2.INTER_AREA)
+
+
+# ========================================================================
+# Fungsi worker untuk batch paralel
+# ========================================================================
+def encode_thumbnail(image):
+    """Encode preview BGR menjadi bytes thumbnail yang siap dikirim ke st.image."""
+    return encode_image(image, *THUMBNAIL_FORMAT)
+
+
+def process_batch_item(data, transform_mode, cache=None, preview_width=350, **params):
+    """
+    Thumbnail asli dan hasil transformasi untuk satu file batch. JPEG di-decode
+    langsung pada resolusi yang cukup untuk preview. Transformasi resolusi
+    penuh dan encode dilakukan terpisah saat download diminta.
+
+    Jika `cache` (TransformCache) diberikan, thumbnail yang sudah pernah dibuat
+    diambil dari cache: thumbnail asli tidak bergantung pada parameter, dan
+    file yang parameternya tidak berubah tidak di-decode sama sekali.
+    """
+    file_hash = None if cache is None else content_hash(data)
+    pyramid = None
+
+    def source():
+        nonlocal pyramid
+        if pyramid is None:
+            w, h = image_size(data)
+            scale = preview_scale((h, w), transform_mode, preview_width, **params)
+            reduce = decode_reduction(data, scale)
+            if cache is None:
+                pyramid = reduced_pyramid(data, reduce)
+            else:
+                pyramid = cache.preview_pyramid(data, file_hash, reduce)
+        return pyramid
+
+    def original():
+        image = render_original_preview(source(), preview_width)
+        return {"image": encode_thumbnail(image), "size": source().shape[1::-1]}
+
+    def transformed():
+        image, final_size = render_preview(source(), transform_mode, preview_width, **params)
+        return {"image": encode_thumbnail(image), "final_size": final_size}
+
+    if cache is None:
+        original, transformed = original(), transformed()
+    else:
+        original = cache.thumbnail(original, file_hash, "original", width=preview_width)
+        transformed = cache.thumbnail(transformed, file_hash, transform_mode, width=preview_width, **params)
+
+    return {
+        "hash": file_hash,
+        "original": original["image"],
+        "transformed": transformed["image"],
+        "size": original["size"],
+        "final_size": transformed["final_size"],
+    }
+
+
+def process_roi_item(data, boxes, scale_factor, cache=None, preview_width=350, interpolation=None):
+    """
+    Thumbnail setiap ROI (kotak relatif, lihat transform_core.normalized_box)
+    sebelum dan sesudah scaling untuk satu file batch. Crop berupa slice dari
+    gambar penuh; gambar hanya di-decode jika ada thumbnail yang belum di-cache.
+    """
+    file_hash = content_hash(data)
+    image = None
+
+    def source():
+        nonlocal image
+        if image is None:
+            image = decode_image(data) if cache is None else cache.decode(data, file_hash)[1]
+        return image
+
+    def render(box):
+        def compute():
+            roi, scaled = scale_roi_box(source(), box, scale_factor, interpolation)
+            return {
+                "original": encode_thumbnail(display_resized(roi, preview_width)),
+                "scaled": encode_thumbnail(display_resized(scaled, preview_width)),
+                "size": roi.shape[1::-1],
+                "scaled_size": scaled.shape[1::-1],
+            }
+        if cache is None:
+            return compute()
+        return cache.thumbnail(compute, file_hash, "roi", box=box, scale_factor=scale_factor,
+                               interpolation=interpolation, width=preview_width)
+
+    return {"hash": file_hash, "rois": [render(box) for box in boxes]}
@@ -0,0 +1,159 @@
+"""
+Instrumentasi waktu dan memori per tahap (decode, resize, warp, encode, ...).
+
+Fungsi inti memanggil `stage(...)` / `timed(...)` di sekitar setiap tahap.
+Selama tidak ada Profiler yang aktif, pemanggilan itu hampir tanpa biaya.
+Profiler diaktifkan per rerun Streamlit atau per eksekusi CLI lewat
+ContextVar, sehingga sesi yang berbeda tidak saling tercampur; BatchExecutor
+meneruskan konteks ini ke thread worker.
+
+Yang dicatat per tahap: durasi, byte output (array/bytes hasil tahap),
+shape output, dan item batch (jika ada).
+"""
+import contextvars
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+_active = contextvars.ContextVar("profiler", default=None)
+_item = contextvars.ContextVar("profiler_item", default=None)
+
+
+# ========================================================================
+# Profiler
+# ========================================================================
+class Profiler:
+    """Kumpulan catatan tahap untuk satu rerun atau satu eksekusi batch."""
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def add(self, stage_name, seconds, value=None, item=None):
+        record = {
+            "stage": stage_name,
+            "seconds": seconds,
+            "bytes": _nbytes(value),
+            "shape": list(value.shape) if hasattr(value, "shape") else None,
+            "item": item,
+        }
+        with self._lock:
+            self.records.append(record)
+
+    def summary(self):
+        """Agregat per tahap: jumlah panggilan, total/rata-rata/maks waktu, total byte."""
+        stages = OrderedDict()
+        for r in self.records:
+            s = stages.setdefault(r["stage"], {"calls": 0, "total_s": 0.0, "max_s": 0.0, "bytes": 0})
+            s["calls"] += 1
+            s["total_s"] += r["seconds"]
+            s["max_s"] = max(s["max_s"], r["seconds"])
+            s["bytes"] += r["bytes"]
+        for s in stages.values():
+            s["mean_s"] = s["total_s"] / s["calls"]
+        return stages
+
+    def by_item(self):
+        """Total waktu per item batch."""
+        items = OrderedDict()
+        for r in self.records:
+            if r["item"] is not None:
+                items[r["item"]] = items.get(r["item"], 0.0) + r["seconds"]
+        return items
+
+    def log_lines(self):
+        """Catatan sebagai JSON lines (log terstruktur)."""
+        return [json.dumps(r) for r in self.records]
+
+    def prometheus(self, prefix="image_transform"):
+        """Counter dalam format teks Prometheus (mis. untuk textfile collector)."""
+        summary = self.summary()
+        lines = []
+        for metric, key, fmt in (("calls", "calls", "{}"), ("seconds", "total_s", "{:.6f}"),
+                                 ("bytes", "bytes", "{}")):
+            lines.append(f"# TYPE {prefix}_stage_{metric}_total counter")
+            for name, s in summary.items():
+                lines.append(f'{prefix}_stage_{metric}_total{{stage="{name}"}} ' + fmt.format(s[key]))
+        return "\n".join(lines) + "\n"
+
+
+def _nbytes(value):
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return 0
+
+
+# ========================================================================
+# Aktivasi dan pencatatan
+# ========================================================================
+def activate(profiler):
+    """Mengaktifkan `profiler` (atau None untuk mematikan) pada konteks saat ini."""
+    _active.set(profiler)
+
+
+def active_profiler():
+    return _active.get()
+
+
+@contextmanager
+def profiling(profiler):
+    """Mengaktifkan `profiler` selama blok with."""
+    token = _active.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def profile_item(item):
+    """Menandai semua tahap di dalam blok sebagai milik item batch `item`."""
+    token = _item.set(item)
+    try:
+        yield
+    finally:
+        _item.reset(token)
+
+
+class stage:
+    """
+    Context manager untuk satu tahap. Hasil tahap bisa diteruskan lewat
+    `output(value)` agar byte dan shape-nya ikut dicatat:
+
+        with stage("warp") as s:
+            out = s.output(cv2.warpAffine(...))
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.value = None
+
+    def output(self, value):
+        self.value = value
+        return value
+
+    def __enter__(self):
+        self.profiler = _active.get()
+        if self.profiler is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profiler is not None:
+            self.profiler.add(self.name, time.perf_counter() - self.start, self.value, _item.get())
+        return False
+
+
+def timed(name, fn, *args, **kwargs):
+    """Memanggil fn(*args, **kwargs) sebagai satu tahap bernama `name`."""
+    profiler = _active.get()
+    if profiler is None:
+        return fn(*args, **kwargs)
+    start = time.perf_counter()
+    value = fn(*args, **kwargs)
+    profiler.add(name, time.perf_counter() - start, value, _item.get())
+    return value
@@ -0,0 +1,169 @@
+"""
+Registrasi gambar: estimasi matriks affine dari banyak pasangan titik.
+
+Pasangan titik berasal dari file korespondensi (CSV/JSON) atau dari keypoint
+ORB/AKAZE yang dicocokkan antara gambar referensi dan setiap gambar batch.
+Matriks diestimasi dengan RANSAC (estimate_affine) lalu diteruskan ke mode
+affine sebagai parameter `matrix`, dengan kanvas seukuran referensi.
+
+Deteksi fitur dijalankan pada versi kecil gambar (sisi terpanjang
+FEATURE_MAX_SIDE, JPEG di-decode tereduksi); koordinat keypoint dikembalikan
+ke resolusi penuh sebelum estimasi.
+"""
+import csv
+import io
+import json
+
+import cv2
+import numpy as np
+
+from transform_core import (
+    AFFINE_MODE, RANSAC_THRESHOLD, decode_image, decode_reduction, estimate_affine,
+    image_size, transform_encoded, write_output
+)
+
+DETECTORS = {
+    "ORB": lambda: cv2.ORB_create(nfeatures=4000),
+}
+# AKAZE tidak ada di sebagian build OpenCV 5 (dipindah ke modul contrib)
+if hasattr(cv2, "AKAZE_create"):
+    DETECTORS["AKAZE"] = cv2.AKAZE_create
+
+# Sisi terpanjang gambar untuk deteksi fitur (piksel)
+FEATURE_MAX_SIDE = 1600
+
+# Rasio Lowe untuk menyaring pasangan descriptor yang ambigu
+MATCH_RATIO = 0.75
+
+# Minimal pasangan yang lolos rasio agar RANSAC dijalankan
+MIN_MATCHES = 8
+
+
+# ========================================================================
+# File korespondensi
+# ========================================================================
+def load_correspondences(data, filename=""):
+    """
+    Membaca pasangan titik dari bytes CSV atau JSON. Mengembalikan
+    (pts1, pts2) berupa array float32 N x 2.
+
+    - CSV : satu pasangan per baris, kolom x1, y1, x2, y2 (header opsional)
+    - JSON: {"src": [[x, y], ...], "dst": [[x, y], ...]} atau daftar
+            {"x1": .., "y1": .., "x2": .., "y2": ..}
+    """
+    text = data.decode("utf-8-sig")
+    if filename.lower().endswith(".json") or text.lstrip()[:1] in ("{", "["):
+        content = json.loads(text)
+        if isinstance(content, dict):
+            pts1, pts2 = content.get("src"), content.get("dst")
+        else:
+            pts1 = [[p["x1"], p["y1"]] for p in content]
+            pts2 = [[p["x2"], p["y2"]] for p in content]
+    else:
+        rows = [row for row in csv.reader(io.StringIO(text)) if row]
+        if rows and not _is_number(rows[0][0]):
+            rows = rows[1:]
+        if any(len(row) < 4 for row in rows):
+            raise ValueError("Setiap baris CSV harus berisi x1, y1, x2, y2")
+        pts1 = [[float(row[0]), float(row[1])] for row in rows]
+        pts2 = [[float(row[2]), float(row[3])] for row in rows]
+
+    if pts1 is None or pts2 is None:
+        raise ValueError("File korespondensi harus berisi titik src dan dst")
+    pts1 = np.asarray(pts1, dtype=np.float32).reshape(-1, 2)
+    pts2 = np.asarray(pts2, dtype=np.float32).reshape(-1, 2)
+    if len(pts1) != len(pts2) or len(pts1) < 3:
+        raise ValueError("Dibutuhkan minimal 3 pasangan titik dengan jumlah yang sama")
+    return pts1, pts2
+
+
+def _is_number(value):
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+
+# ========================================================================
+# Deteksi dan pencocokan fitur
+# ========================================================================
+def feature_image(data, max_side=FEATURE_MAX_SIDE):
+    """Gambar grayscale kecil untuk deteksi fitur dan faktor skala ke resolusi penuh (sx, sy)."""
+    w, h = image_size(data)
+    scale = min(1.0, max_side / max(w, h))
+    image = decode_image(data, decode_reduction(data, scale))
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    if scale < 1.0 and max(gray.shape) > max_side:
+        gray = cv2.resize(gray, (max(1, int(w * scale)), max(1, int(h * scale))),
+                          interpolation=cv2.INTER_AREA)
+    return gray, (w / gray.shape[1], h / gray.shape[0])
+
+
+def detect_features(data, detector="ORB"):
+    """
+    Keypoint dan descriptor satu gambar. Mengembalikan dict dengan `points`
+    (N x 2, koordinat resolusi penuh), `descriptors`, dan `size` (w, h).
+    """
+    gray, (sx, sy) = feature_image(data)
+    keypoints, descriptors = DETECTORS[detector]().detectAndCompute(gray, None)
+    points = np.float32([kp.pt for kp in keypoints]).reshape(-1, 2)
+    # Pusat piksel gambar kecil -> koordinat resolusi penuh
+    points = (points + 0.5) * np.float32([sx, sy]) - 0.5
+    return {"points": points, "descriptors": descriptors, "size": image_size(data)}
+
+
+def match_features(moving, reference, ratio=MATCH_RATIO):
+    """Pasangan titik (moving, reference) yang lolos uji rasio Lowe."""
+    if moving["descriptors"] is None or reference["descriptors"] is None:
+        return np.empty((0, 2), np.float32), np.empty((0, 2), np.float32)
+
+    matcher = cv2.BFMatcher(cv2.NORM_HAMMING)
+    pairs = matcher.knnMatch(moving["descriptors"], reference["descriptors"], k=2)
+    good = [p[0] for p in pairs if len(p) == 2 and p[0].distance < ratio * p[1].distance]
+    src = moving["points"][[m.queryIdx for m in good]]
+    dst = reference["points"][[m.trainIdx for m in good]]
+    return src.reshape(-1, 2), dst.reshape(-1, 2)
+
+
+def register(moving, reference, ransac_threshold=RANSAC_THRESHOLD):
+    """
+    Matriks affine yang memetakan gambar `moving` ke bidang gambar `reference`
+    (keduanya hasil detect_features). Mengembalikan dict berisi `matrix`
+    (None jika gagal), `matches`, dan `inliers`.
+    """
+    src, dst = match_features(moving, reference)
+    result = {"matrix": None, "matches": len(src), "inliers": 0}
+    if len(src) < MIN_MATCHES:
+        return result
+    try:
+        M, inliers = estimate_affine(src, dst, ransac_threshold)
+    except ValueError:
+        return result
+    result.update(matrix=M, inliers=int(inliers.sum()))
+    return result
+
+
+# ========================================================================
+# Jalur headless
+# ========================================================================
+def transform_file_registered(paths, reference, detector="ORB", output_format="PNG", quality=None,
+                              **params):
+    """
+    Seperti transform_file, tetapi setiap gambar diselaraskan ke `reference`
+    (hasil detect_features) dengan matriks hasil registrasi. Gambar yang gagal
+    diregistrasi menimbulkan ValueError.
+    """
+    src, dst = paths
+    with open(src, "rb") as f:
+        data = f.read()
+
+    result = register(detect_features(data, detector), reference)
+    if result["matrix"] is None:
+        raise ValueError(f"Registrasi gagal untuk {src} ({result['matches']} pasangan fitur)")
+
+    transformed = transform_encoded(
+        data, AFFINE_MODE, matrix=result["matrix"], size=reference["size"], **params
+    )
+    write_output(dst, transformed, output_format, quality)
+    return dst
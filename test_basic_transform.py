@@ -0,0 +1,70 @@
+"""
+Uji kebenaran apply_basic_transform (satu warp gabungan) terhadap
+implementasi awal tiga tahap: resize, warp rotasi, lalu warp translasi.
+
+    python -m pytest -q test_basic_transform.py
+"""
+import cv2
+import numpy as np
+import pytest
+
+from benchmark import three_pass_transform
+from transform_core import apply_basic_transform
+
+# Selisih rata-rata maksimum (level abu-abu) terhadap hasil tiga tahap
+MAX_MEAN_DIFF = 1.0
+
+
+@pytest.fixture(scope="module")
+def image():
+    """Gambar 480x640 halus (gradien + pola sinus), seperti foto tanpa noise."""
+    y, x = np.mgrid[0:480, 0:640].astype(np.float64)
+    layers = [
+        60 + 0.2 * x + 0.15 * y + 40 * np.sin(x / (23 + 7 * c)) * np.cos(y / 31)
+        for c in range(3)
+    ]
+    return np.clip(np.dstack(layers), 0, 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize("rotation_angle, scale_factor, tx, ty", [
+    # Masing-masing tahap
+    (30, 1.0, 0, 0),
+    (-45, 1.0, 0, 0),
+    (0, 0.5, 0, 0),
+    (0, 1.7, 0, 0),
+    (0, 1.0, 25, -40),
+    (0, 1.0, 12.5, 7.25),
+    # Gabungan
+    (30, 0.5, 25, 25),
+    (120, 1.5, -30, 10),
+    (15, 2.0, 3.5, -8.5),
+])
+def test_matches_three_pass(image, rotation_angle, scale_factor, tx, ty):
+    expected = three_pass_transform(image, rotation_angle, scale_factor, tx, ty)
+    result = apply_basic_transform(image, rotation_angle, scale_factor, tx, ty)
+
+    assert result.shape == expected.shape
+    assert np.abs(result.astype(np.int16) - expected).mean() < MAX_MEAN_DIFF
+
+
+# Rotasi kelipatan 90° tidak dibandingkan dengan tiga tahap: getRotationMatrix2D
+# terhadap (w // 2, h // 2) di sana menggeser hasil satu piksel dan menyisakan
+# satu baris/kolom putih. Jalur baru harus identik dengan cv2.rotate.
+@pytest.mark.parametrize("rotation_angle, code", [
+    (90, cv2.ROTATE_90_COUNTERCLOCKWISE),
+    (180, cv2.ROTATE_180),
+    (270, cv2.ROTATE_90_CLOCKWISE),
+    (-90, cv2.ROTATE_90_CLOCKWISE),
+])
+@pytest.mark.parametrize("scale_factor", [1.0, 0.5])
+def test_quarter_turn_matches_cv2_rotate(image, rotation_angle, code, scale_factor):
+    h, w = image.shape[:2]
+    scaled = cv2.resize(image, (int(w * scale_factor), int(h * scale_factor))) if scale_factor != 1.0 else image
+    expected = cv2.rotate(scaled, code)
+    result = apply_basic_transform(image, rotation_angle, scale_factor, 0, 0)
+
+    assert np.array_equal(result, expected)
+
+
+def test_identity_returns_input(image):
+    assert apply_basic_transform(image, 0, 1.0, 0, 0) is image
@@ -0,0 +1,90 @@
+"""
+Uji pipeline.py: optimize_pipeline tidak boleh mengubah hasil, dan preset
+JSON/YAML harus kembali utuh setelah disimpan lalu dibaca.
+
+    python -m pytest -q test_pipeline.py
+"""
+import cv2
+import numpy as np
+import pytest
+
+from pipeline import PRESET_FORMATS, dump_preset, load_preset, optimize_pipeline, parse_pipeline
+from transform_core import apply_pipeline
+
+
+@pytest.fixture(scope="module")
+def image():
+    """Gambar 400x600 noise yang di-blur: cukup detail untuk mendeteksi geseran satu piksel."""
+    rng = np.random.default_rng(0)
+    noise = rng.integers(0, 256, (400, 600, 3), dtype=np.uint8)
+    return cv2.GaussianBlur(noise, (0, 0), 3)
+
+
+@pytest.mark.parametrize("ops, optimized_ops", [
+    # Rotasi tanpa expand dijumlahkan, juga jika jumlahnya kelipatan 90°
+    ([{"op": "rotate", "angle": 45, "expand": False}, {"op": "rotate", "angle": 45, "expand": False}], 1),
+    ([{"op": "rotate", "angle": 30, "expand": False}, {"op": "rotate", "angle": 20, "expand": False}], 1),
+    ([{"op": "rotate", "angle": 100, "expand": False}, {"op": "rotate", "angle": 80, "expand": False}], 1),
+    ([{"op": "rotate", "angle": 90, "expand": False}, {"op": "rotate", "angle": -90, "expand": False}], 0),
+    # Translasi dijumlahkan, flip saling meniadakan
+    ([{"op": "translate", "tx": 10.5, "ty": -3}, {"op": "translate", "tx": -4, "ty": 8.25}], 1),
+    ([{"op": "translate", "tx": 7, "ty": 0}, {"op": "translate", "tx": -7, "ty": 0}], 0),
+    ([{"op": "flip", "axis": "horizontal"}, {"op": "flip", "axis": "vertical"}], 1),
+    ([{"op": "flip", "axis": "both"}, {"op": "flip", "axis": "both"}], 0),
+    # Operasi tanpa efek dibuang
+    ([{"op": "scale", "factor": 1.0}, {"op": "rotate", "angle": 360}, {"op": "crop", "box": [0, 0, 1, 1]},
+      {"op": "rotate", "angle": 15}], 1),
+    # Rantai campuran
+    ([{"op": "crop", "box": [0.1, 0.1, 0.9, 0.9]}, {"op": "scale", "factor": 0.5},
+      {"op": "rotate", "angle": 60, "expand": False}, {"op": "rotate", "angle": 30, "expand": False},
+      {"op": "flip"}, {"op": "flip"}, {"op": "translate", "tx": 5}], 4),
+])
+def test_optimize_keeps_output(image, ops, optimized_ops):
+    ops = parse_pipeline(ops)
+    optimized = optimize_pipeline(ops)
+    assert len(optimized) == optimized_ops
+
+    expected = apply_pipeline(image, ops)
+    result = apply_pipeline(image, optimized)
+    assert result.shape == expected.shape
+    assert np.abs(result.astype(np.int16) - expected).max() <= 1
+
+
+def test_quarter_turn_without_expand_is_exact(image):
+    h, w = image.shape[:2]
+    square = image[:, (w - h) // 2:(w + h) // 2]
+    result = apply_pipeline(square, [{"op": "rotate", "angle": 90, "expand": False}])
+    assert np.array_equal(result, cv2.rotate(square, cv2.ROTATE_90_COUNTERCLOCKWISE))
+
+
+PRESET_OPS = [
+    {"op": "crop", "box": [0.1, 0.1, 0.9, 0.9]},
+    {"op": "scale", "fx": 0.5, "fy": 0.25},
+    {"op": "rotate", "angle": 15, "expand": False},
+    {"op": "translate", "tx": 3.5, "ty": -2},
+    {"op": "flip", "axis": "vertical"},
+    {"op": "affine", "matrix": [[1, 0.1, 0], [0, 1, 5]], "size": [320, 240]},
+]
+
+
+@pytest.mark.parametrize("preset_format", list(PRESET_FORMATS))
+@pytest.mark.parametrize("interpolation, name", [(None, None), ("Area", "thumbnail miring")])
+def test_preset_round_trip(preset_format, interpolation, name):
+    ops = parse_pipeline(PRESET_OPS)
+    text = dump_preset(ops, interpolation, name, preset_format)
+    preset = load_preset(text.encode(), f"preset{PRESET_FORMATS[preset_format][0]}")
+    assert preset == {"name": name, "interpolation": interpolation, "ops": ops}
+
+
+@pytest.mark.parametrize("text", [
+    '{"ops": [{"op": "shear"}]}',
+    '{"ops": [{"op": "scale", "factor": 0}]}',
+    '{"ops": [{"op": "rotate", "angle": "90"}]}',
+    '{"ops": [{"op": "crop", "box": [0.5, 0, 0.4, 1]}]}',
+    '{"ops": [{"op": "flip", "axis": "diagonal"}]}',
+    '{"interpolation": "Bicubic", "ops": []}',
+    '{"ops": {"op": "rotate"}}',
+])
+def test_invalid_preset_rejected(text):
+    with pytest.raises(ValueError):
+        load_preset(text, "preset.json")
@@ -0,0 +1,144 @@
+"""
+Warp bertile untuk gambar yang lebih besar dari RAM.
+
+Kanvas output dibagi menjadi tile. Untuk setiap tile, batas tile
+diproyeksikan balik lewat matriks invers untuk mencari area sumber yang
+dibutuhkan; hanya area itu yang dibaca, di-warp, lalu ditulis langsung ke
+output. Sumber dan output berupa memmap (.npy atau raw), sehingga memori
+puncak hanya bergantung pada ukuran tile, bukan ukuran gambar (untuk skala
+kecil, area sumber per tile membesar sebanding 1 / skala).
+"""
+import os
+
+import cv2
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from batch import BatchExecutor
+from profiler import timed
+from transform_core import interpolation_flag, max_stretch, transform_matrix
+
+DEFAULT_TILE_SIZE = 1024
+
+# Margin piksel sumber di sekitar area hasil proyeksi balik (cukup untuk kernel Lanczos 8x8)
+SOURCE_MARGIN = 4
+
+
+# ========================================================================
+# Sumber dan output memmap
+# ========================================================================
+def open_source(path, shape=None, dtype=np.uint8):
+    """
+    Membuka gambar sumber sebagai memmap read-only. File .npy dibaca dari
+    header-nya; file raw membutuhkan `shape` (h, w, c) dan `dtype`.
+    """
+    if path.lower().endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    if shape is None:
+        raise ValueError("Sumber raw membutuhkan parameter shape")
+    return np.memmap(path, dtype=dtype, mode="r", shape=tuple(shape))
+
+
+def create_output(path, shape, dtype=np.uint8):
+    """Membuat file output .npy berukuran penuh sebagai memmap yang bisa ditulis."""
+    return open_memmap(path, mode="w+", dtype=dtype, shape=tuple(shape))
+
+
+# ========================================================================
+# Warp bertile
+# ========================================================================
+def source_bounds(M_inv, x0, y0, x1, y1, src_shape):
+    """
+    Area sumber (sx0, sy0, sx1, sy1) yang dibutuhkan tile output [x0, x1) x [y0, y1),
+    atau None jika tile seluruhnya jatuh di luar gambar sumber.
+    """
+    corners = np.array([[x0, y0, 1], [x1, y0, 1], [x0, y1, 1], [x1, y1, 1]], dtype=np.float64)
+    src = corners @ M_inv.T
+    h, w = src_shape[:2]
+
+    sx0 = max(int(np.floor(src[:, 0].min())) - SOURCE_MARGIN, 0)
+    sy0 = max(int(np.floor(src[:, 1].min())) - SOURCE_MARGIN, 0)
+    sx1 = min(int(np.ceil(src[:, 0].max())) + SOURCE_MARGIN, w)
+    sy1 = min(int(np.ceil(src[:, 1].max())) + SOURCE_MARGIN, h)
+    if sx0 >= sx1 or sy0 >= sy1:
+        return None
+    return sx0, sy0, sx1, sy1
+
+
+def output_tiles(dsize, tile_size):
+    """Daftar tile output (x0, y0, x1, y1) dalam urutan baris."""
+    w, h = dsize
+    return [
+        (x0, y0, min(x0 + tile_size, w), min(y0 + tile_size, h))
+        for y0 in range(0, h, tile_size)
+        for x0 in range(0, w, tile_size)
+    ]
+
+
+def warp_tiled(src, M, dsize, out, tile_size=DEFAULT_TILE_SIZE, workers=1, flags=cv2.INTER_LINEAR):
+    """
+    Menulis hasil warp affine `src` dengan matriks 3x3 `M` ke array `out`
+    (biasanya memmap) tile demi tile. Tile yang berbeda ditulis ke area
+    output yang terpisah, jadi aman diproses paralel dengan `workers` thread.
+    `flags` adalah flag interpolasi OpenCV.
+    """
+    M_inv = np.linalg.inv(M)
+    white = (255,) * (src.shape[2] if src.ndim == 3 else 1)
+
+    def render_tile(tile):
+        x0, y0, x1, y1 = tile
+        bounds = source_bounds(M_inv, x0, y0, x1, y1, src.shape)
+        if bounds is None:
+            out[y0:y1, x0:x1] = 255
+            return tile
+
+        sx0, sy0, sx1, sy1 = bounds
+        region = np.ascontiguousarray(src[sy0:sy1, sx0:sx1])
+
+        # Koordinat lokal: region sumber -> gambar sumber -> output -> tile
+        M_tile = (
+            np.array([[1, 0, -x0], [0, 1, -y0], [0, 0, 1]], dtype=np.float64)
+            @ M
+            @ np.array([[1, 0, sx0], [0, 1, sy0], [0, 0, 1]], dtype=np.float64)
+        )
+        out[y0:y1, x0:x1] = timed(
+            "tile_warp", cv2.warpAffine,
+            region, M_tile[:2], (x1 - x0, y1 - y0), flags=flags,
+            borderMode=cv2.BORDER_CONSTANT, borderValue=white
+        )
+        return tile
+
+    executor = BatchExecutor(max_workers=workers)
+    for _ in executor.map(render_tile, output_tiles(dsize, tile_size)):
+        pass
+    return out
+
+
+def transform_tiled(src, out_path, transform_mode, tile_size=DEFAULT_TILE_SIZE, workers=1, **params):
+    """
+    Transformasi mode basic/affine dari `src` (array atau memmap) ke file
+    .npy `out_path` secara bertile. Mengembalikan memmap output. "Area" di
+    sini berarti linear: resize INTER_AREA seluruh gambar tidak bisa bertile.
+    """
+    M, dsize = transform_matrix(src.shape, transform_mode, **params)
+    w, h = dsize
+    out = create_output(out_path, (h, w) + src.shape[2:], src.dtype)
+    flags = interpolation_flag(params.get('interpolation'), max_stretch(M))
+    warp_tiled(src, M, dsize, out, tile_size, workers, flags)
+    out.flush()
+    return out
+
+
+def transform_file_tiled(paths, transform_mode, tile_size=DEFAULT_TILE_SIZE, workers=1,
+                         shape=None, dtype=np.uint8, **params):
+    """
+    Versi bertile dari transform_file: `paths` berupa (src, dst) dengan sumber
+    .npy/raw dan output .npy, ditulis ke file sementara lalu di-rename.
+    """
+    src_path, dst = paths
+    src = open_source(src_path, shape, dtype)
+    tmp = dst + ".part"
+    out = transform_tiled(src, tmp, transform_mode, tile_size, workers, **params)
+    del out
+    os.replace(tmp, dst)
+    return dst
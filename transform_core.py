@@ -0,0 +1,623 @@
+"""
+Inti transformasi gambar tanpa ketergantungan ke Streamlit.
+
+Dipakai oleh aplikasi Streamlit (transformation.py) maupun jalur headless
+(cli.py), sehingga transformasi yang sama bisa dijalankan dari cron job atau
+worker tanpa membuka UI.
+"""
+import os
+import hashlib
+import cv2
+import numpy as np
+from PIL import Image
+from io import BytesIO
+
+from backends import get_backend
+from profiler import stage, timed
+
+BASIC_MODE = "Basic (Rotation + Scaling)"
+AFFINE_MODE = "Affine Transformation"
+PIPELINE_MODE = "Pipeline"
+
+# Metode resampling untuk tahap resize/warp resolusi penuh
+INTERPOLATIONS = {
+    "Nearest": cv2.INTER_NEAREST,
+    "Linear": cv2.INTER_LINEAR,
+    "Area": cv2.INTER_AREA,
+    "Cubic": cv2.INTER_CUBIC,
+    "Lanczos": cv2.INTER_LANCZOS4,
+}
+DEFAULT_INTERPOLATION = "Linear"
+
+# Kode cv2.rotate untuk rotasi tepat (berlawanan arah jarum jam, seperti getRotationMatrix2D)
+EXACT_ROTATIONS = {
+    90: cv2.ROTATE_90_COUNTERCLOCKWISE,
+    180: cv2.ROTATE_180,
+    270: cv2.ROTATE_90_CLOCKWISE,
+}
+
+# ========================================================================
+# Fungsi decode / encode
+# ========================================================================
+def content_hash(data):
+    """Hash isi file (bytes) untuk kunci cache."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+# Flag decode JPEG beresolusi rendah (downscale di domain DCT) per faktor reduksi
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def decode_image(data, reduce=1):
+    """
+    Decode bytes file (JPG/PNG) menjadi array BGR. Seluruh pipeline bekerja
+    dalam urutan kanal BGR milik OpenCV, jadi tidak ada konversi warna
+    penuh saat decode maupun encode. `data` dibaca tanpa salinan (np.frombuffer).
+    `reduce` (2/4/8) men-decode langsung pada 1/reduce resolusi.
+    """
+    image = timed(
+        "decode" if reduce == 1 else f"decode_reduced_{reduce}",
+        cv2.imdecode, np.frombuffer(data, dtype=np.uint8), REDUCED_DECODE_FLAGS[reduce]
+    )
+    if image is None:
+        raise ValueError("Gagal membaca gambar")
+    return image
+
+
+def image_size(data):
+    """
+    Ukuran (w, h) gambar dari header saja, setelah orientasi EXIF
+    diterapkan seperti pada cv2.imdecode.
+    """
+    img = Image.open(BytesIO(data))
+    w, h = img.size
+    if img.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+        w, h = h, w
+    return w, h
+
+
+def decode_reduction(data, scale):
+    """
+    Faktor reduksi decode terbesar (1, 2, 4, 8) yang resolusinya masih
+    >= `scale` x resolusi asli. Hanya JPEG yang bisa di-decode tereduksi
+    secara murah; format lain selalu 1.
+    """
+    if data[:2] != b"\xff\xd8":
+        return 1
+    for reduce in (8, 4, 2):
+        if scale * reduce <= 1:
+            return reduce
+    return 1
+
+
+# Format output: ekstensi, mime type, dan kualitas/kompresi default
+OUTPUT_FORMATS = {
+    "PNG": (".png", "image/png", 3),
+    "JPEG": (".jpg", "image/jpeg", 95),
+    "WebP": (".webp", "image/webp", 90),
+}
+
+
+def encode_image(image, output_format="PNG", quality=None):
+    """
+    Encode array BGR langsung dengan cv2.imencode (tanpa lewat PIL).
+    `quality` berarti level kompresi 0-9 untuk PNG, dan kualitas 1-100 untuk JPEG/WebP.
+    """
+    ext, _, default_quality = OUTPUT_FORMATS[output_format]
+    if quality is None:
+        quality = default_quality
+
+    if output_format == "PNG":
+        params = [cv2.IMWRITE_PNG_COMPRESSION, int(quality)]
+    elif output_format == "JPEG":
+        params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+    else:
+        params = [cv2.IMWRITE_WEBP_QUALITY, int(quality)]
+
+    with stage(f"encode_{output_format.lower()}") as s:
+        ok, buf = cv2.imencode(ext, image, params)
+        if not ok:
+            raise ValueError(f"Gagal encode gambar ke {output_format}")
+        return s.output(buf.tobytes())
+
+
+def encode_png(image, compression=None):
+    """Encode array BGR menjadi bytes PNG."""
+    return encode_image(image, "PNG", compression)
+
+# ========================================================================
+# Fungsi DISPLAY Helper
+# ========================================================================
+def display_resized(image, max_width=350):
+    """Resize hanya untuk tampilan agar konsisten."""
+    h, w = image.shape[:2]
+    scale = max_width / w
+    new_w = int(w * scale)
+    new_h = int(h * scale)
+    resized = timed("display_resize", get_backend().resize, image, (new_w, new_h),
+                    interpolation=interpolation_flag("Area", scale))
+    return resized
+
+
+def interpolation_flag(interpolation=DEFAULT_INTERPOLATION, scale=1.0):
+    """
+    Flag OpenCV untuk metode `interpolation` pada tahap dengan faktor skala
+    `scale`. "Area" hanya berarti untuk memperkecil; saat memperbesar dipakai
+    linear.
+    """
+    if interpolation == "Area" and scale >= 1:
+        return cv2.INTER_LINEAR
+    return INTERPOLATIONS[interpolation or DEFAULT_INTERPOLATION]
+
+# ========================================================================
+# Fungsi transformasi full image dengan mode basic
+# ========================================================================
+def pixel_scale_matrix(sx, sy):
+    """Matriks 3x3 untuk scaling dengan konvensi pusat piksel cv2.resize."""
+    return np.array([[sx, 0, 0.5 * (sx - 1)],
+                     [0, sy, 0.5 * (sy - 1)],
+                     [0, 0, 1]], dtype=np.float64)
+
+
+def translation_matrix(tx, ty):
+    """Matriks 3x3 untuk translasi (tx, ty)."""
+    return np.array([[1, 0, tx], [0, 1, ty], [0, 0, 1]], dtype=np.float64)
+
+
+def basic_transform_matrix(shape, rotation_angle, scale_factor, tx, ty):
+    """
+    Menyusun matriks 3x3 (homogen) untuk scale -> rotate -> translate
+    beserta ukuran kanvas output, identik dengan urutan pada mode basic.
+    """
+    ops = []
+    if scale_factor != 1.0:
+        ops.append({"op": "scale", "factor": scale_factor})
+    if rotation_angle != 0:
+        ops.append({"op": "rotate", "angle": rotation_angle})
+    if tx != 0 or ty != 0:
+        ops.append({"op": "translate", "tx": tx, "ty": ty})
+    return pipeline_matrix(shape, ops)
+
+
+def is_exact_basic(rotation_angle, tx, ty):
+    """Rotasi kelipatan 90° dengan translasi bilangan bulat: bisa tanpa interpolasi."""
+    return rotation_angle % 90 == 0 and float(tx).is_integer() and float(ty).is_integer()
+
+
+def scale_image(image, dsize, interpolation=DEFAULT_INTERPOLATION):
+    """
+    Resize ke `dsize`. Faktor skala bulat dengan metode Nearest cukup
+    menduplikasi piksel (np.repeat), tanpa interpolasi.
+    """
+    h, w = image.shape[:2]
+    if dsize == (w, h):
+        return image
+    fx, fy = dsize[0] / w, dsize[1] / h
+    if interpolation == "Nearest" and fx == fy and fx.is_integer():
+        return timed("scale_repeat", lambda: np.repeat(np.repeat(image, int(fx), axis=0), int(fx), axis=1))
+    return timed("resize", get_backend().resize, image, dsize,
+                 interpolation=interpolation_flag(interpolation, min(fx, fy)))
+
+
+def shift_image(image, tx, ty):
+    """Translasi bilangan bulat dengan slicing; area yang kosong diisi putih."""
+    tx, ty = int(tx), int(ty)
+    if tx == 0 and ty == 0:
+        return image
+    h, w = image.shape[:2]
+    with stage("shift") as s:
+        out = s.output(np.full_like(image, 255))
+        if abs(tx) < w and abs(ty) < h:
+            out[max(ty, 0):h + min(ty, 0), max(tx, 0):w + min(tx, 0)] = \
+                image[max(-ty, 0):h - max(ty, 0), max(-tx, 0):w - max(tx, 0)]
+    return out
+
+
+def exact_basic_transform(image, rotation_angle, dsize, tx, ty, interpolation=DEFAULT_INTERPOLATION):
+    """
+    Jalur cepat tanpa warp untuk is_exact_basic: resize ke `dsize` (ukuran
+    setelah scaling), rotasi tepat dengan cv2.rotate, lalu translasi dengan
+    slicing. Rotasi dan translasi berupa salinan piksel, bukan interpolasi.
+    """
+    image = scale_image(image, dsize, interpolation)
+    code = EXACT_ROTATIONS.get(int(rotation_angle) % 360)
+    if code is not None:
+        image = timed("rotate_exact", cv2.rotate, image, code)
+    return shift_image(image, tx, ty)
+
+
+def area_prescale(image, M, interpolation=DEFAULT_INTERPOLATION):
+    """
+    cv2.warpAffine tidak mendukung INTER_AREA (jatuh ke linear). Untuk "Area"
+    yang memperkecil, gambar lebih dulu di-resize INTER_AREA sebesar
+    pengecilan per sumbu, sehingga warp sisanya tidak lagi memperkecil.
+    Mengembalikan (gambar, matriks sisa terhadap gambar tersebut).
+    """
+    if interpolation != "Area":
+        return image, M
+    h, w = image.shape[:2]
+    fx, fy = np.minimum(np.linalg.norm(M[:2, :2], axis=0), 1.0)
+    dsize = (max(1, round(w * fx)), max(1, round(h * fy)))
+    if dsize == (w, h):
+        return image, M
+    image = timed("resize_area", get_backend().resize, image, dsize, interpolation=cv2.INTER_AREA)
+    return image, M @ pixel_scale_matrix(w / dsize[0], h / dsize[1])
+
+
+def warp_image(image, M, dsize, interpolation=DEFAULT_INTERPOLATION, name="warp"):
+    """Satu warp affine dengan matriks 3x3 `M` (didahului area_prescale untuk "Area")."""
+    image, M = area_prescale(image, M, interpolation)
+    return timed(
+        name, get_backend().warp_affine,
+        image, M[:2], dsize, flags=interpolation_flag(interpolation, max_stretch(M))
+    )
+
+
+def apply_basic_transform(image, rotation_angle, scale_factor, tx, ty, interpolation=DEFAULT_INTERPOLATION):
+    # Identitas: tidak ada yang perlu dihitung
+    if rotation_angle == 0 and scale_factor == 1.0 and tx == 0 and ty == 0:
+        return image
+
+    M, dsize = basic_transform_matrix(image.shape, rotation_angle, scale_factor, tx, ty)
+
+    # Rotasi 0/90/180/270° dan translasi bulat: salinan piksel tanpa warp
+    if is_exact_basic(rotation_angle, tx, ty):
+        h, w = image.shape[:2]
+        scaled = (int(w * scale_factor), int(h * scale_factor)) if scale_factor != 1.0 else (w, h)
+        return exact_basic_transform(image, rotation_angle, scaled, tx, ty, interpolation)
+
+    # Scale, rotasi dan translasi digabung menjadi satu kali warp
+    return warp_image(image, M, dsize, interpolation)
+
+# ========================================================================
+# Fungsi ROI (kotak crop)
+# ========================================================================
+def normalized_box(left, top, width, height, size):
+    """
+    Kotak cropper (piksel pada gambar berukuran `size` = (w, h)) menjadi
+    kotak relatif (x0, y0, x1, y1) dalam rentang 0-1, tidak bergantung pada
+    resolusi gambar yang ditampilkan.
+    """
+    w, h = size
+    x0, y0 = max(left, 0) / w, max(top, 0) / h
+    return (x0, y0, min((left + width) / w, 1.0), min((top + height) / h, 1.0))
+
+
+def roi_pixels(box, shape):
+    """Kotak relatif menjadi koordinat piksel (x0, y0, x1, y1) gambar `shape`, minimal 1 piksel."""
+    h, w = shape[:2]
+    x0 = min(int(round(box[0] * w)), w - 1)
+    y0 = min(int(round(box[1] * h)), h - 1)
+    x1 = max(int(round(box[2] * w)), x0 + 1)
+    y1 = max(int(round(box[3] * h)), y0 + 1)
+    return x0, y0, min(x1, w), min(y1, h)
+
+
+def crop_roi(image, box):
+    """ROI sebagai view (slice NumPy, tanpa salinan) dari gambar resolusi penuh."""
+    x0, y0, x1, y1 = roi_pixels(box, image.shape)
+    return image[y0:y1, x0:x1]
+
+
+def scale_roi_box(image, box, scale_factor, interpolation=DEFAULT_INTERPOLATION):
+    """Crop `box` (relatif) dari gambar penuh lalu scale. Mengembalikan (roi, roi hasil scaling)."""
+    roi = crop_roi(image, box)
+    h, w = roi.shape[:2]
+    dsize = (max(1, int(w * scale_factor)), max(1, int(h * scale_factor)))
+    return roi, scale_image(roi, dsize, interpolation)
+
+# ========================================================================
+# Fungsi transformasi affine
+# ========================================================================
+# Ambang reprojeksi RANSAC (piksel) untuk estimasi affine dari banyak titik
+RANSAC_THRESHOLD = 3.0
+
+
+def estimate_affine(pts1, pts2, ransac_threshold=RANSAC_THRESHOLD):
+    """
+    Estimasi matriks affine 2x3 dari N >= 3 pasangan titik. Tepat 3 titik
+    memakai cv2.getAffineTransform; lebih dari itu cv2.estimateAffine2D
+    dengan RANSAC sehingga pasangan yang salah (outlier) diabaikan.
+    Mengembalikan (matriks, mask inlier).
+    """
+    pts1 = np.asarray(pts1, dtype=np.float32).reshape(-1, 2)
+    pts2 = np.asarray(pts2, dtype=np.float32).reshape(-1, 2)
+    if len(pts1) != len(pts2) or len(pts1) < 3:
+        raise ValueError("Dibutuhkan minimal 3 pasangan titik dengan jumlah yang sama")
+    if len(pts1) == 3:
+        return cv2.getAffineTransform(pts1, pts2), np.ones(3, dtype=bool)
+
+    M, inliers = cv2.estimateAffine2D(
+        pts1, pts2, method=cv2.RANSAC, ransacReprojThreshold=ransac_threshold
+    )
+    if M is None:
+        raise ValueError("Matriks affine tidak dapat diestimasi dari titik yang diberikan")
+    return M, inliers.ravel().astype(bool)
+
+
+def affine_matrix(pts1=None, pts2=None, matrix=None):
+    """Matriks affine 2x3 dari `matrix` (jika sudah diestimasi) atau dari pasangan titik."""
+    if matrix is not None:
+        return np.asarray(matrix, dtype=np.float64)[:2]
+    return estimate_affine(pts1, pts2)[0]
+
+
+def apply_affine_transform(image, pts1=None, pts2=None, interpolation=DEFAULT_INTERPOLATION,
+                           matrix=None, size=None):
+    """
+    Warp affine dari pasangan titik atau `matrix` 2x3 yang sudah diestimasi.
+    Kanvas output berukuran `size` (w, h), default sama dengan gambar input.
+    """
+    h, w = image.shape[:2]
+    M_affine = np.vstack([affine_matrix(pts1, pts2, matrix), [0, 0, 1]])
+    return warp_image(image, M_affine, tuple(size or (w, h)), interpolation, "warp_affine")
+
+
+# ========================================================================
+# Operasi geometri (mode basic dan pipeline)
+# ========================================================================
+# Setiap operasi menerima ukuran kanvas saat ini (w, h) dan mengembalikan
+# matriks 3x3 serta ukuran kanvas setelah operasi tersebut.
+def scale_op(canvas, factor=1.0, fx=None, fy=None):
+    """Scaling (mengikuti konvensi koordinat piksel cv2.resize), kanvas ikut berubah."""
+    w, h = canvas
+    fx = factor if fx is None else fx
+    fy = factor if fy is None else fy
+    new_w, new_h = max(1, int(w * fx)), max(1, int(h * fy))
+    return pixel_scale_matrix(new_w / w, new_h / h), (new_w, new_h)
+
+
+def rotate_op(canvas, angle=0, expand=True):
+    """Rotasi terhadap pusat; dengan `expand` kanvas diperbesar agar seluruh gambar terlihat."""
+    w, h = canvas
+    if angle % 360 == 0:
+        return np.eye(3), canvas
+    if angle % 90 == 0:
+        # Kelipatan 90°: matriks bulat terhadap pusat piksel, identik dengan cv2.rotate
+        cos, sin = round(np.cos(np.radians(angle))), round(np.sin(np.radians(angle)))
+        R = np.array([[cos, sin], [-sin, cos]], dtype=np.float64)
+        out = (h, w) if expand and angle % 180 else (w, h)
+        t = (np.array(out) - 1) / 2 - R @ ((np.array(canvas) - 1) / 2)
+        return np.vstack([np.column_stack([R, t]), [0, 0, 1]]), out
+    if not expand:
+        # Pusat piksel yang sama dengan kelipatan 90°, sehingga rotasi berurutan
+        # tanpa expand setara dengan satu rotasi sebesar jumlah sudutnya
+        M_rotate = cv2.getRotationMatrix2D(((w - 1) / 2, (h - 1) / 2), angle, 1.0)
+        return np.vstack([M_rotate, [0, 0, 1]]), canvas
+    center = (w // 2, h // 2)
+    M_rotate = cv2.getRotationMatrix2D(center, angle, 1.0)
+    cos = np.abs(M_rotate[0, 0])
+    sin = np.abs(M_rotate[0, 1])
+
+    w, h = int((h * sin) + (w * cos)), int((h * cos) + (w * sin))
+
+    M_rotate[0, 2] += (w / 2) - center[0]
+    M_rotate[1, 2] += (h / 2) - center[1]
+    return np.vstack([M_rotate, [0, 0, 1]]), (w, h)
+
+
+def translate_op(canvas, tx=0, ty=0):
+    """Translasi; ukuran kanvas tetap."""
+    return translation_matrix(tx, ty), canvas
+
+
+def flip_op(canvas, axis="horizontal"):
+    """Cermin horizontal, vertikal, atau keduanya; ukuran kanvas tetap."""
+    w, h = canvas
+    sx = -1 if axis in ("horizontal", "both") else 1
+    sy = -1 if axis in ("vertical", "both") else 1
+    M = np.array([[sx, 0, w - 1 if sx < 0 else 0],
+                  [0, sy, h - 1 if sy < 0 else 0],
+                  [0, 0, 1]], dtype=np.float64)
+    return M, canvas
+
+
+def crop_op(canvas, box=(0.0, 0.0, 1.0, 1.0)):
+    """Crop kotak relatif (x0, y0, x1, y1) seperti ROI; kanvas menjadi seukuran kotak."""
+    x0, y0, x1, y1 = roi_pixels(box, canvas[::-1])
+    return translation_matrix(-x0, -y0), (x1 - x0, y1 - y0)
+
+
+def affine_op(canvas, pts1=None, pts2=None, matrix=None, size=None):
+    """Affine dari pasangan titik atau matriks 2x3; kanvas `size` (w, h) jika diberikan."""
+    M_affine = affine_matrix(pts1, pts2, matrix)
+    return np.vstack([M_affine, [0, 0, 1]]), tuple(size) if size is not None else canvas
+
+
+PIPELINE_OPS = {
+    "scale": scale_op,
+    "rotate": rotate_op,
+    "translate": translate_op,
+    "flip": flip_op,
+    "crop": crop_op,
+    "affine": affine_op,
+}
+
+
+def pipeline_matrix(shape, ops):
+    """
+    Melipat rangkaian operasi `ops` (dict dengan kunci "op" dan parameternya)
+    menjadi satu matriks 3x3 beserta ukuran kanvas akhir, jadi rantai sepanjang
+    apa pun cukup dieksekusi dengan satu warp.
+    """
+    h, w = shape[:2]
+    M, canvas = np.eye(3), (w, h)
+    for op in ops:
+        if op.get("op") not in PIPELINE_OPS:
+            raise ValueError(f"Operasi pipeline tidak dikenal: {op.get('op')}")
+        params = {name: value for name, value in op.items() if name != "op"}
+        M_op, canvas = PIPELINE_OPS[op["op"]](canvas, **params)
+        M = M_op @ M
+    return M, canvas
+
+
+def is_exact_matrix(M):
+    """Matriks yang hanya memindah piksel (flip, rotasi 90°, translasi bulat): tanpa interpolasi."""
+    linear = np.round(M[:2, :2], 12)
+    return (np.isin(linear, (-1, 0, 1)).all() and (np.abs(linear).sum(axis=0) == 1).all()
+            and np.allclose(M[:2, 2], np.round(M[:2, 2])))
+
+
+def pipeline_execution(M, dsize, shape):
+    """
+    Cara termurah menjalankan matriks gabungan: "identity" (tanpa proses),
+    "resize" (hanya scaling), "exact" (salinan piksel, warp nearest) atau "warp".
+    """
+    h, w = shape[:2]
+    if tuple(dsize) == (w, h) and np.allclose(M, np.eye(3)):
+        return "identity"
+    if np.allclose(M, pixel_scale_matrix(dsize[0] / w, dsize[1] / h)):
+        return "resize"
+    if is_exact_matrix(M):
+        return "exact"
+    return "warp"
+
+
+def apply_pipeline(image, ops, interpolation=DEFAULT_INTERPOLATION):
+    """Menjalankan pipeline sebagai satu resize atau satu warp dari matriks gabungan."""
+    M, dsize = pipeline_matrix(image.shape, ops)
+    return execute_matrix(image, M, dsize, pipeline_execution(M, dsize, image.shape), interpolation)
+
+
+def execute_matrix(image, M, dsize, execution, interpolation=DEFAULT_INTERPOLATION):
+    """Menjalankan matriks gabungan dengan cara `execution` dari pipeline_execution."""
+    if execution == "identity":
+        return image
+    if execution == "resize":
+        return scale_image(image, dsize, interpolation)
+
+    # Matriks yang hanya memindah piksel tidak butuh interpolasi
+    if execution == "exact":
+        return timed("warp_pipeline", get_backend().warp_affine, image, M[:2], dsize, flags=cv2.INTER_NEAREST)
+    return warp_image(image, M, dsize, interpolation, "warp_pipeline")
+
+
+def max_stretch(M):
+    """Faktor pembesaran terbesar dari bagian linear matriks (nilai singular maksimum)."""
+    return float(np.linalg.svd(M[:2, :2], compute_uv=False).max())
+
+
+def transform_matrix(shape, transform_mode, **params):
+    """Matriks 3x3 dan ukuran kanvas output untuk mode transformasi apa pun."""
+    if transform_mode == BASIC_MODE:
+        return basic_transform_matrix(
+            shape,
+            params.get('rotation_angle', 0),
+            params.get('scale_factor', 1.0),
+            params.get('tx', 0),
+            params.get('ty', 0)
+        )
+    elif transform_mode == AFFINE_MODE:
+        h, w = shape[:2]
+        M_affine = affine_matrix(params.get('pts1'), params.get('pts2'), params.get('matrix'))
+        size = params.get('size')
+        return np.vstack([M_affine, [0, 0, 1]]), tuple(size) if size is not None else (w, h)
+    elif transform_mode == PIPELINE_MODE:
+        return pipeline_matrix(shape, params.get('pipeline', []))
+    raise ValueError(f"Mode transformasi tidak dikenal: {transform_mode}")
+
+# ========================================================================
+# Fungsi untuk memproses satu gambar
+# ========================================================================
+def process_single_image(image, transform_mode, roi_scale_mode=None, **params):
+    """
+    Memproses satu gambar berdasarkan mode transformasi yang dipilih
+    """
+    if transform_mode == BASIC_MODE:
+        if roi_scale_mode == "Scale ROI Saja":
+            return None  # ROI akan diproses terpisah
+        else:
+            return apply_basic_transform(
+                image,
+                params.get('rotation_angle', 0),
+                params.get('scale_factor', 1.0),
+                params.get('tx', 0),
+                params.get('ty', 0),
+                params.get('interpolation', DEFAULT_INTERPOLATION)
+            )
+    elif transform_mode == AFFINE_MODE:
+        pts1 = params.get('pts1')
+        pts2 = params.get('pts2')
+        return apply_affine_transform(
+            image, pts1, pts2, params.get('interpolation', DEFAULT_INTERPOLATION),
+            params.get('matrix'), params.get('size')
+        )
+    elif transform_mode == PIPELINE_MODE:
+        return apply_pipeline(
+            image, params.get('pipeline', []), params.get('interpolation', DEFAULT_INTERPOLATION)
+        )
+
+def transform_reduction(data, transform_mode, **params):
+    """Faktor reduksi decode (decode_reduction) yang dipakai transform_encoded untuk parameter ini."""
+    w, h = image_size(data)
+    M, _ = transform_matrix((h, w), transform_mode, **params)
+    return decode_reduction(data, max_stretch(M))
+
+
+def transform_encoded(data, transform_mode, **params):
+    """
+    Decode + transformasi resolusi penuh dari bytes file. Jika transformasi
+    memperkecil gambar (misalnya scale_factor 0.1-0.5), JPEG di-decode
+    langsung pada resolusi tereduksi lalu diselesaikan dengan resize/warp
+    kecil yang tepat; ukuran output sama dengan jalur decode penuh.
+    """
+    w, h = image_size(data)
+    M, dsize = transform_matrix((h, w), transform_mode, **params)
+    reduce = decode_reduction(data, max_stretch(M))
+    if reduce == 1:
+        return process_single_image(decode_image(data), transform_mode, **params)
+
+    image = decode_image(data, reduce)
+    h_r, w_r = image.shape[:2]
+    interpolation = params.get('interpolation', DEFAULT_INTERPOLATION)
+    if transform_mode == BASIC_MODE:
+        rotation_angle, tx, ty = (params.get(name, 0) for name in ('rotation_angle', 'tx', 'ty'))
+        if is_exact_basic(rotation_angle, tx, ty):
+            # Ukuran setelah scaling = kanvas output sebelum rotasi
+            scaled = dsize if rotation_angle % 180 == 0 else dsize[::-1]
+            return exact_basic_transform(image, rotation_angle, scaled, tx, ty, interpolation)
+
+    # Matriks resolusi penuh dikomposisikan dengan skala tereduksi -> penuh
+    M_reduced = M @ pixel_scale_matrix(w / w_r, h / h_r)
+    return warp_image(image, M_reduced, dsize, interpolation)
+
+# ========================================================================
+# Fungsi estimasi memori batch
+# ========================================================================
+def estimate_batch_bytes(data):
+    """
+    Perkiraan memori satu item batch dari header gambar (tanpa decode):
+    gambar hasil decode dan piramida preview.
+    """
+    w, h = Image.open(BytesIO(data)).size
+    return int(w * h * 3 * 1.5)
+
+
+# ========================================================================
+# Fungsi worker untuk jalur headless (file -> file)
+# ========================================================================
+def write_output(dst, image, output_format="PNG", quality=None):
+    """Menulis hasil secara atomik (file sementara lalu rename)."""
+    tmp = dst + ".part"
+    with open(tmp, "wb") as f:
+        f.write(encode_image(image, output_format, quality))
+    os.replace(tmp, dst)
+
+
+def transform_file(paths, transform_mode, output_format="PNG", quality=None, **params):
+    """
+    Membaca `src`, mentransformasi, lalu menulis hasil ke `dst` secara atomik
+    agar proses yang terhenti bisa dilanjutkan.
+    `paths` berupa tuple (src, dst) supaya cocok dengan BatchExecutor.map.
+    """
+    src, dst = paths
+    with open(src, "rb") as f:
+        transformed = transform_encoded(f.read(), transform_mode, **params)
+
+    write_output(dst, transformed, output_format, quality)
+    return dst
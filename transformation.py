@@ -1,10 +1,36 @@
-import cv2
+import os
+import tempfile
 import numpy as np
 import streamlit as st
 from PIL import Image
-from io import BytesIO
+from functools import partial
 from streamlit_cropper import st_cropper
 
+from archive import ARCHIVE_FORMATS, write_archive
+from backends import calibration_results, get_backend
+from batch import BatchExecutor
+from cache import TransformCache
+from profiler import Profiler, activate, profile_item, stage
+from pipeline import EXAMPLE_PIPELINE, PRESET_FORMATS, dump_preset, load_preset, optimize_pipeline, pipeline_plan
+from registration import DETECTORS, load_correspondences
+from transform_core import (
+    BASIC_MODE, AFFINE_MODE, PIPELINE_MODE, DEFAULT_INTERPOLATION, INTERPOLATIONS, OUTPUT_FORMATS, content_hash,
+    affine_matrix, decode_reduction, display_resized, encode_image, estimate_affine, estimate_batch_bytes, image_size,
+    normalized_box, scale_roi_box, transform_encoded
+)
+from preview import (
+    process_batch_item, process_roi_item, preview_scale, render_preview, render_original_preview
+)
+
+# Lebar maksimum preview pada mode Single Image (piksel)
+PREVIEW_WIDTH = 800
+
+# Pilihan jumlah gambar per halaman pada mode Batch
+BATCH_PAGE_SIZES = [10, 25, 50]
+
+# Sisi terpanjang proxy gambar untuk cropper ROI (batas tampilan st_cropper)
+ROI_PROXY_SIDE = 700
+
 # Konfigurasi aplikasi
 st.set_page_config(page_title="Image Transformation App", layout="wide")
 
@@ -32,117 +58,295 @@ else:
         accept_multiple_files=False
     )
 
-# ========================================================================
-# Fungsi DISPLAY Helper
-# ========================================================================
-def display_resized(image, max_width=350):
-    """Resize hanya untuk tampilan agar konsisten."""
-    h, w = image.shape[:2]
-    scale = max_width / w
-    new_w = int(w * scale)
-    new_h = int(h * scale)
-    resized = cv2.resize(image, (new_w, new_h))
-    return resized
+# Format file hasil download
+st.sidebar.subheader("💾 Format Output")
+output_format = st.sidebar.selectbox("Format", list(OUTPUT_FORMATS))
+if output_format == "PNG":
+    output_quality = st.sidebar.slider("Level Kompresi PNG", 0, 9, OUTPUT_FORMATS["PNG"][2])
+else:
+    output_quality = st.sidebar.slider("Kualitas", 1, 100, OUTPUT_FORMATS[output_format][2])
+
+# Metode resampling untuk resize/warp (rotasi 90/180/270° dan geseran bulat selalu tanpa interpolasi)
+st.sidebar.subheader("🎚 Interpolasi")
+interpolation = st.sidebar.selectbox(
+    "Metode Resampling", list(INTERPOLATIONS), index=list(INTERPOLATIONS).index(DEFAULT_INTERPOLATION),
+    help="Nearest tercepat, Area terbaik untuk memperkecil, Cubic/Lanczos lebih tajam tetapi lebih lambat"
+)
+
+# Profiler per rerun (opsional), ditampilkan di akhir sidebar
+st.sidebar.subheader("📊 Performance")
+profile_enabled = st.sidebar.checkbox("Tampilkan profil per tahap", value=False)
+profiler = Profiler() if profile_enabled else None
+activate(profiler)
 
 # ========================================================================
-# Fungsi transformasi full image dengan mode basic
+# Cache hasil (bertahan antar-rerun dan antar-sesi)
 # ========================================================================
-def apply_basic_transform(image, rotation_angle, scale_factor, tx, ty):
-    h, w = image.shape[:2]
-
-    # 1. Scaling Full Image
-    if scale_factor != 1.0:
-        new_w = int(w * scale_factor)
-        new_h = int(h * scale_factor)
-        img = cv2.resize(image, (new_w, new_h))
-    else:
-        img = image.copy()
-
-    h, w = img.shape[:2]
+@st.cache_resource
+def get_transform_cache():
+    return TransformCache()
 
-    # 2. Rotation
-    if rotation_angle != 0:
-        center = (w // 2, h // 2)
-        M_rotate = cv2.getRotationMatrix2D(center, rotation_angle, 1.0)
-        cos = np.abs(M_rotate[0, 0])
-        sin = np.abs(M_rotate[0, 1])
 
-        new_w = int((h * sin) + (w * cos))
-        new_h = int((h * cos) + (w * sin))
+transform_cache = get_transform_cache()
 
-        M_rotate[0, 2] += (new_w / 2) - center[0]
-        M_rotate[1, 2] += (new_h / 2) - center[1]
+# ========================================================================
+# Fungsi ROI Scaling
+# ========================================================================
+def select_roi(data, file_hash, key):
+    """
+    Cropper pada proxy kecil gambar; mengembalikan kotak ROI relatif
+    (x0, y0, x1, y1). Crop dan scaling dilakukan pada gambar resolusi penuh.
+    """
+    # Proxy sudah dalam RGB dan <= ROI_PROXY_SIDE, jadi cropper tidak perlu resize lagi
+    proxy = transform_cache.roi_proxy(data, file_hash, ROI_PROXY_SIDE)
+    rect = st_cropper(
+        Image.fromarray(proxy),
+        realtime_update=True,
+        box_color="#FF0000",
+        aspect_ratio=None,
+        return_type="box",
+        should_resize_image=False,
+        key=key
+    )
+    return normalized_box(rect["left"], rect["top"], rect["width"], rect["height"], proxy.shape[1::-1])
 
-        img = cv2.warpAffine(
-            img, M_rotate, (new_w, new_h),
-            borderMode=cv2.BORDER_CONSTANT, borderValue=(255, 255, 255)
-        )
 
-    # 3. Translation
-    if tx != 0 or ty != 0:
-        M_translate = np.float32([[1, 0, tx], [0, 1, ty]])
-        img = cv2.warpAffine(
-            img, M_translate, (img.shape[1], img.shape[0]),
-            borderMode=cv2.BORDER_CONSTANT, borderValue=(255, 255, 255)
-        )
+def saved_rois(key, current):
+    """
+    Daftar ROI untuk `key`: ROI yang sudah disimpan di session state, atau
+    hanya kotak cropper saat ini jika belum ada yang disimpan.
+    """
+    saved = st.session_state.setdefault("roi_boxes", {}).setdefault(key, [])
+    col1, col2 = st.columns(2)
+    if col1.button("➕ Simpan ROI", key=f"save_roi_{key}"):
+        saved.append(current)
+    if saved and col2.button(f"🗑 Hapus {len(saved)} ROI Tersimpan", key=f"clear_roi_{key}"):
+        saved.clear()
+    if saved:
+        st.caption(f"{len(saved)} ROI tersimpan diproses; kotak cropper saat ini bisa ditambahkan dengan ➕ Simpan ROI.")
+    return list(saved) or [current]
+
+
+def roi_download_button(label, file_stem, key, data, file_hash, box):
+    """Download ROI hasil scaling; crop dan scaling resolusi penuh baru dihitung saat diminta."""
+    def encode():
+        _, image = transform_cache.decode(data, file_hash)
+        _, scaled = scale_roi_box(image, box, scale_factor, interpolation)
+        return encode_image(scaled, output_format, output_quality)
+
+    lazy_download_button(label, file_stem, key, encode=encode)
 
-    return img
+# ========================================================================
+# Fungsi tampilan gambar (serialisasi Streamlit ikut diukur)
+# ========================================================================
+def show_image(image, use_container_width=False):
+    with stage("st_image") as s:
+        st.image(s.output(image), use_container_width=use_container_width, channels="BGR")
 
 # ========================================================================
-# Fungsi transformasi affine
+# Fungsi preview mode Single Image
 # ========================================================================
-def apply_affine_transform(image, pts1, pts2):
-    h, w = image.shape[:2]
-    M_affine = cv2.getAffineTransform(pts1, pts2)
-    transformed = cv2.warpAffine(image, M_affine, (w, h),
-                                 borderMode=cv2.BORDER_CONSTANT, borderValue=(255, 255, 255))
-    return transformed
+def single_preview_pyramid(data, file_hash, transform_mode, **params):
+    """Piramida preview dengan resolusi decode secukupnya untuk parameter saat ini."""
+    w, h = image_size(data)
+    scale = preview_scale((h, w), transform_mode, PREVIEW_WIDTH, allow_upscale=False, **params)
+    return transform_cache.preview_pyramid(data, file_hash, decode_reduction(data, scale))
+
+@st.cache_data
+def estimate_from_correspondences(points_data, filename):
+    """Matriks affine (RANSAC) dari file korespondensi; diestimasi sekali per isi file."""
+    pts1, pts2 = load_correspondences(points_data, filename)
+    matrix, inliers = estimate_affine(pts1, pts2)
+    return {"matrix": matrix, "inliers": int(inliers.sum()), "points": len(pts1)}
 
 # ========================================================================
-# Fungsi ROI Scaling
+# Editor pipeline (preset JSON/YAML)
 # ========================================================================
-def scale_roi(image, scale_factor):
-    st.info("Pilih area ROI di bawah ini, lalu ROI akan di-scale.")
+def pipeline_editor():
+    """
+    Editor preset pipeline di sidebar (upload file atau edit teks JSON/YAML).
+    Mengembalikan parameter mode pipeline: operasi yang sudah dioptimasi dan
+    interpolasi (dari preset jika diatur, selain itu dari sidebar).
+    """
+    st.sidebar.subheader("🧩 Pipeline")
+    preset_file = st.sidebar.file_uploader("Upload Preset", type=["json", "yaml", "yml"], key="preset_file")
+    if preset_file is not None:
+        text, source = preset_file.getvalue().decode("utf-8-sig"), preset_file.name
+    else:
+        text, source = dump_preset(EXAMPLE_PIPELINE), "contoh"
 
-    roi = st_cropper(
-        Image.fromarray(image),
-        realtime_update=True,
-        box_color="#FF0000",
-        aspect_ratio=None
+    # Key ikut isi preset agar teks diganti saat file lain diupload
+    text = st.sidebar.text_area(
+        "Spesifikasi (JSON/YAML)", text, height=260, key=f"pipeline_text_{content_hash(text.encode())}",
+        help="Operasi: scale, rotate, translate, flip, crop, affine"
     )
+    try:
+        preset = load_preset(text, source if source.endswith((".yaml", ".yml")) else "")
+    except ValueError as exc:
+        st.error(f"Preset tidak valid: {exc}")
+        st.stop()
+
+    pipeline_interpolation = preset["interpolation"] or interpolation
+    if preset["interpolation"]:
+        st.sidebar.caption(f"Interpolasi dari preset: {preset['interpolation']}")
+
+    # Simpan preset agar bisa dipakai lagi (UI, batch, atau cli.py --preset)
+    preset_format = st.sidebar.selectbox("Format Preset", list(PRESET_FORMATS))
+    ext, mime = PRESET_FORMATS[preset_format]
+    st.sidebar.download_button(
+        "💾 Simpan Preset", dump_preset(preset["ops"], preset["interpolation"], preset["name"], preset_format),
+        file_name=f"{preset['name'] or 'pipeline'}{ext}", mime=mime
+    )
+    return dict(pipeline=optimize_pipeline(preset["ops"]), interpolation=pipeline_interpolation), preset
 
-    roi_np = np.array(roi)
-
-    # Scale ROI
-    h, w = roi_np.shape[:2]
-    new_w = int(w * scale_factor)
-    new_h = int(h * scale_factor)
-    scaled_roi = cv2.resize(roi_np, (new_w, new_h))
 
-    return roi_np, scaled_roi
+def show_pipeline_plan(preset, shape):
+    """Ringkasan optimasi pipeline untuk gambar berukuran `shape`."""
+    plan = pipeline_plan(preset["ops"], shape)
+    labels = {"identity": "tanpa proses", "resize": "1x resize", "exact": "1x salinan piksel", "warp": "1x warp"}
+    st.caption(
+        f"🧩 {plan['ops']} operasi → {plan['optimized_ops']} setelah optimasi → "
+        f"{labels[plan['execution']]} (ukuran output {plan['size'][0]} x {plan['size'][1]})"
+    )
 
 # ========================================================================
-# Fungsi untuk memproses satu gambar
+# Fungsi download (encode hanya saat diminta)
 # ========================================================================
-def process_single_image(image, transform_mode, roi_scale_mode=None, **params):
+def lazy_download_button(label, file_stem, key, encode, encoded=None):
     """
-    Memproses satu gambar berdasarkan mode transformasi yang dipilih
+    Tombol download yang baru meng-encode gambar setelah diminta.
+    `encoded` berisi bytes jika hasil encode sudah ada di cache.
     """
-    if transform_mode == "Basic (Rotation + Scaling)":
-        if roi_scale_mode == "Scale ROI Saja":
-            return None  # ROI akan diproses terpisah
-        else:
-            return apply_basic_transform(
-                image,
-                params.get('rotation_angle', 0),
-                params.get('scale_factor', 1.0),
-                params.get('tx', 0),
-                params.get('ty', 0)
+    ext, mime, _ = OUTPUT_FORMATS[output_format]
+    if encoded is None:
+        if not st.button(f"⚙ Siapkan {label}", key=f"prepare_{key}"):
+            return
+        encoded = encode()
+    st.download_button(f"📥 {label}", encoded, file_name=f"{file_stem}{ext}", mime=mime, key=key)
+
+
+def cached_download_button(label, file_stem, key, data, file_hash, transform_mode, **params):
+    """Tombol download untuk hasil transformasi yang encode-nya di-memoize di cache."""
+    encode_params = dict(output_format=output_format, quality=output_quality, **params)
+    lazy_download_button(
+        label, file_stem, key,
+        encode=lambda: transform_cache.encode(data, transform_mode, **encode_params),
+        encoded=transform_cache.cached_encoding(file_hash, transform_mode, **encode_params)
+    )
+
+def archive_download_button(uploaded_files, transform_mode, workers, item_params=None, **params):
+    """
+    Satu arsip berisi hasil resolusi penuh semua gambar batch. Setiap gambar
+    ditulis ke file sementara di disk begitu selesai di-encode, jadi selama
+    arsip disusun memori tidak bertambah dengan jumlah gambar. Arsip yang
+    sudah jadi tetap dibaca utuh ke memori oleh st.download_button.
+    """
+    st.subheader("📦 Download Semua")
+    col1, col2 = st.columns(2)
+    archive_format = col1.selectbox("Format Arsip", list(ARCHIVE_FORMATS), key="archive_format")
+    with_manifest = col2.checkbox("Sertakan manifest.json", value=True, key="archive_manifest")
+    if not st.button(f"⚙ Siapkan Arsip ({len(uploaded_files)} gambar)", key="prepare_archive"):
+        return
+
+    ext, _, _ = OUTPUT_FORMATS[output_format]
+    items = [(f"{os.path.splitext(file.name)[0]}{ext}", file) for file in uploaded_files]
+    progress_bar = st.progress(0.0, text="Menyiapkan arsip...")
+
+    def progress(done, total):
+        progress_bar.progress(done / total, text=f"Menyiapkan arsip... {done}/{total}")
+
+    def encode(file):
+        # Bytes upload baru disalin di worker, hanya untuk item yang sedang berjalan
+        data = file.getvalue()
+        file_hash = content_hash(data)
+        metadata = {
+            "source": file.name, "source_hash": file_hash, "transform_mode": transform_mode,
+            "params": params, "format": output_format, "quality": output_quality,
+        }
+        with profile_item(file.name):
+            try:
+                item = dict(params, **item_params(data, file_hash)) if item_params else params
+            except ValueError as exc:
+                # Item gagal hanya dicatat di manifest
+                return None, dict(metadata, error=str(exc))
+            encoded = transform_cache.cached_encoding(
+                file_hash, transform_mode, output_format, output_quality, **item
             )
-    elif transform_mode == "Affine Transformation":
-        pts1 = params.get('pts1')
-        pts2 = params.get('pts2')
-        return apply_affine_transform(image, pts1, pts2)
+            if encoded is None:
+                encoded = encode_image(
+                    transform_encoded(data, transform_mode, **item), output_format, output_quality
+                )
+        return encoded, dict(metadata, params=item)
+
+    archive_ext, mime = ARCHIVE_FORMATS[archive_format]
+    fd, path = tempfile.mkstemp(suffix=archive_ext)
+    try:
+        with os.fdopen(fd, "w+b") as spool:
+            write_archive(spool, items, encode, archive_format, with_manifest, workers, progress)
+            size_mb = spool.tell() / 2**20
+        # st.download_button hanya menerima str/bytes/BytesIO/BufferedReader, bukan
+        # file sementara (BufferedRandom); arsip dibuka ulang read-only lalu dibaca
+        # Streamlit sekali ke memori
+        with open(path, "rb") as archive:
+            st.download_button(
+                f"📥 Download Arsip ({size_mb:.1f} MB)", archive,
+                file_name=f"batch_results{archive_ext}", mime=mime, key="download_archive"
+            )
+    finally:
+        os.remove(path)
+
+
+# ========================================================================
+# Fungsi batch paralel (UI)
+# ========================================================================
+def batch_page(uploaded_files):
+    """
+    File pada halaman batch yang sedang dibuka: (index awal, daftar file).
+    Hanya halaman ini yang diproses dan dikirim ke browser setiap rerun.
+    """
+    st.sidebar.subheader("📄 Tampilan Batch")
+    page_size = st.sidebar.selectbox("Gambar per Halaman", BATCH_PAGE_SIZES)
+    pages = -(-len(uploaded_files) // page_size)
+    page = 1
+    if pages > 1:
+        # Key ikut berubah saat jumlah halaman berubah agar nilai lama tidak di luar batas
+        page = st.sidebar.number_input("Halaman", 1, pages, 1, key=f"batch_page_{page_size}_{pages}")
+    start = (page - 1) * page_size
+    end = min(start + page_size, len(uploaded_files))
+    st.caption(f"Menampilkan gambar {start + 1}-{end} dari {len(uploaded_files)} (halaman {page}/{pages})")
+    return start, uploaded_files[start:end]
+
+
+def run_batch(uploaded_files, transform_mode, workers, memory_limit_mb, item_params=None, **params):
+    """
+    Menjalankan batch secara paralel dengan progress bar, hasil berurutan.
+
+    `item_params(data, file_hash)` (opsional) memberi parameter tambahan per
+    gambar, mis. matriks hasil registrasi. Parameter itu disimpan di
+    result["params"]; ValueError darinya menjadi result["error"].
+    """
+    items = [(file.name, file.getvalue()) for file in uploaded_files]
+    progress_bar = st.progress(0.0, text="Memproses batch...")
+
+    def progress(done, total):
+        progress_bar.progress(done / total, text=f"Memproses batch... {done}/{total}")
+
+    process = partial(process_batch_item, transform_mode=transform_mode, cache=transform_cache, **params)
+
+    def worker(item):
+        name, data = item
+        with profile_item(name):
+            extra = {}
+            if item_params is not None:
+                try:
+                    extra = item_params(data, content_hash(data))
+                except ValueError as exc:
+                    return {"error": str(exc)}
+            return dict(process(data, **extra), params=dict(params, **extra))
+
+    executor = BatchExecutor(max_workers=workers, memory_limit=memory_limit_mb * 1024 * 1024)
+    yield from executor.map(worker, items, estimate=lambda item: estimate_batch_bytes(item[1]),
+                            progress=progress)
 
 # ========================================================================
 # ======================== MODE SINGLE IMAGE =============================
@@ -152,19 +356,17 @@ if mode == "Single Image":
     if uploaded_files is not None:
         file = uploaded_files
 
-        # Baca gambar
-        file_bytes = np.asarray(bytearray(file.read()), dtype=np.uint8)
-        image_bgr = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
-        image = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
-
-        h, w = image.shape[:2]
+        # Ukuran dibaca dari header; decode penuh hanya dilakukan jika dibutuhkan
+        data = file.getvalue()
+        file_hash = content_hash(data)
+        w, h = image_size(data)
         st.sidebar.success(f"Ukuran gambar: {w} x {h} pixels")
 
         # Pilih mode transformasi
         st.sidebar.subheader("🎯 Mode Transformasi")
-        transform_mode = st.sidebar.radio("Pilih Mode:", ["Basic (Rotation + Scaling)", "Affine Transformation"])
+        transform_mode = st.sidebar.radio("Pilih Mode:", [BASIC_MODE, AFFINE_MODE, PIPELINE_MODE])
 
-        if transform_mode == "Basic (Rotation + Scaling)":
+        if transform_mode == BASIC_MODE:
             # Mode ROI
             st.sidebar.subheader("🟥 ROI Scaling Mode")
             roi_scale_mode = st.sidebar.radio(
@@ -186,22 +388,30 @@ if mode == "Single Image":
             tx = col1.number_input("Shift X", -500, 500, 0, 10)
             ty = col2.number_input("Shift Y", -500, 500, 0, 10)
 
+            basic_params = dict(rotation_angle=rotation_angle, scale_factor=scale_factor, tx=tx, ty=ty,
+                                interpolation=interpolation)
+
+            # Preview dirender dari piramida mip, resolusi penuh hanya untuk download
+            pyramid = single_preview_pyramid(data, file_hash, BASIC_MODE, **basic_params)
+            original_preview = render_original_preview(pyramid, PREVIEW_WIDTH, allow_upscale=False)
+
             # Tampilan gambar asli
             col1, col2 = st.columns(2)
 
             with col1:
                 st.subheader("📷 Gambar Asli")
-                st.image(image, use_container_width=True)
+                show_image(original_preview, use_container_width=True)
                 st.caption(f"Ukuran: {w} x {h} pixels")
 
             if roi_scale_mode == "Scale Full Image":
                 # Proses transformasi basic
-                transformed = apply_basic_transform(image, rotation_angle, scale_factor, tx, ty)
+                transformed, (w_final, h_final) = render_preview(
+                    pyramid, BASIC_MODE, PREVIEW_WIDTH, allow_upscale=False, **basic_params
+                )
 
                 with col2:
                     st.subheader("✨ Hasil Transformasi")
-                    st.image(transformed, use_container_width=True)
-                    h_final, w_final = transformed.shape[:2]
+                    show_image(transformed, use_container_width=True)
                     st.caption(f"Ukuran: {w_final} x {h_final} pixels")
 
                 # Info metrics
@@ -218,115 +428,166 @@ if mode == "Single Image":
 
                 # Download
                 st.markdown("---")
-                buf = BytesIO()
-                Image.fromarray(transformed).save(buf, format="PNG")
-                st.download_button(
-                    label="📥 DOWNLOAD HASIL TRANSFORMASI",
-                    data=buf.getvalue(),
-                    file_name="transformed.png",
-                    mime="image/png"
+                cached_download_button(
+                    "DOWNLOAD HASIL TRANSFORMASI", "transformed", "download_basic",
+                    data, file_hash, BASIC_MODE, **basic_params
                 )
 
             else:  # Scale ROI Saja
                 st.markdown("---")
                 st.subheader("🟥 ROI Scaling")
-                original_roi, scaled_roi = scale_roi(image, scale_factor)
+                st.info("Pilih area ROI di bawah ini, lalu ROI akan di-scale.")
+                boxes = saved_rois(file_hash, select_roi(data, file_hash, f"cropper_{file_hash}"))
 
-                col3, col4 = st.columns(2)
-                with col3:
-                    st.write("**ROI Asli:**")
-                    st.image(original_roi, use_container_width=True)
-                    h_roi, w_roi = original_roi.shape[:2]
-                    st.caption(f"Ukuran: {w_roi} x {h_roi} pixels")
+                # ROI berupa slice dari gambar penuh (tanpa salinan), hanya ROI yang di-resize
+                _, image = transform_cache.decode(data, file_hash)
+                for n, box in enumerate(boxes, 1):
+                    original_roi, scaled_roi = scale_roi_box(image, box, scale_factor, interpolation)
 
-                with col4:
-                    st.write("**ROI Setelah Scaling:**")
-                    st.image(scaled_roi, use_container_width=True)
-                    h_scaled, w_scaled = scaled_roi.shape[:2]
-                    st.caption(f"Ukuran: {w_scaled} x {h_scaled} pixels")
+                    col3, col4 = st.columns(2)
+                    with col3:
+                        st.write(f"**ROI {n} Asli:**")
+                        show_image(display_resized(original_roi, PREVIEW_WIDTH), use_container_width=True)
+                        h_roi, w_roi = original_roi.shape[:2]
+                        st.caption(f"Ukuran: {w_roi} x {h_roi} pixels")
 
-                # Download ROI
-                st.markdown("---")
-                buf = BytesIO()
-                Image.fromarray(scaled_roi).save(buf, format="PNG")
-                st.download_button(
-                    label="📥 DOWNLOAD ROI SCALED",
-                    data=buf.getvalue(),
-                    file_name="scaled_roi.png",
-                    mime="image/png"
-                )
+                    with col4:
+                        st.write(f"**ROI {n} Setelah Scaling:**")
+                        show_image(display_resized(scaled_roi, PREVIEW_WIDTH), use_container_width=True)
+                        h_scaled, w_scaled = scaled_roi.shape[:2]
+                        st.caption(f"Ukuran: {w_scaled} x {h_scaled} pixels")
+
+                    # Download ROI
+                    roi_download_button(
+                        f"DOWNLOAD ROI {n} SCALED", f"scaled_roi_{n}", f"download_roi_{n}", data, file_hash, box
+                    )
+                    st.markdown("---")
 
-        else:  # Affine Transformation
-            st.sidebar.subheader("🔷 Affine Transform")
-            st.sidebar.markdown("**Source Points (Titik Asal):**")
-            
-            # Source Points
-            col1, col2 = st.sidebar.columns(2)
+        elif transform_mode == PIPELINE_MODE:
+            pipeline_params, preset = pipeline_editor()
+
+            # Preview: seluruh rantai dilipat menjadi satu warp dari piramida mip
+            pyramid = single_preview_pyramid(data, file_hash, PIPELINE_MODE, **pipeline_params)
+            original_preview = render_original_preview(pyramid, PREVIEW_WIDTH, allow_upscale=False)
+            transformed, (w_final, h_final) = render_preview(
+                pyramid, PIPELINE_MODE, PREVIEW_WIDTH, allow_upscale=False, **pipeline_params
+            )
+
+            col1, col2 = st.columns(2)
             with col1:
-                src_x1 = st.number_input("P1 X", 0, w, min(50, w), 5, key="src_x1")
-                src_x2 = st.number_input("P2 X", 0, w, min(200, w), 5, key="src_x2")
-                src_x3 = st.number_input("P3 X", 0, w, min(50, w), 5, key="src_x3")
+                st.subheader("📷 Gambar Asli")
+                show_image(original_preview, use_container_width=True)
+                st.caption(f"Ukuran: {w} x {h} pixels")
+
             with col2:
-                src_y1 = st.number_input("P1 Y", 0, h, min(50, h), 5, key="src_y1")
-                src_y2 = st.number_input("P2 Y", 0, h, min(50, h), 5, key="src_y2")
-                src_y3 = st.number_input("P3 Y", 0, h, min(200, h), 5, key="src_y3")
-            
-            st.sidebar.markdown("**Destination Points (Titik Tujuan):**")
-            
-            # Destination Points
-            col3, col4 = st.sidebar.columns(2)
-            with col3:
-                dst_x1 = st.number_input("P1' X", 0, w, min(10, w), 5, key="dst_x1")
-                dst_x2 = st.number_input("P2' X", 0, w, min(200, w), 5, key="dst_x2")
-                dst_x3 = st.number_input("P3' X", 0, w, min(100, w), 5, key="dst_x3")
-            with col4:
-                dst_y1 = st.number_input("P1' Y", 0, h, min(100, h), 5, key="dst_y1")
-                dst_y2 = st.number_input("P2' Y", 0, h, min(50, h), 5, key="dst_y2")
-                dst_y3 = st.number_input("P3' Y", 0, h, min(250, h), 5, key="dst_y3")
-            
-            # Hitung Affine Transform
-            pts1 = np.float32([[src_x1, src_y1], [src_x2, src_y2], [src_x3, src_y3]])
-            pts2 = np.float32([[dst_x1, dst_y1], [dst_x2, dst_y2], [dst_x3, dst_y3]])
-            transformed = apply_affine_transform(image, pts1, pts2)
-            
+                st.subheader("✨ Hasil Transformasi")
+                show_image(transformed, use_container_width=True)
+                st.caption(f"Ukuran: {w_final} x {h_final} pixels")
+
+            st.markdown("---")
+            show_pipeline_plan(preset, (h, w))
+
+            # Download
+            st.markdown("---")
+            cached_download_button(
+                "DOWNLOAD HASIL TRANSFORMASI", "pipeline_transformed", "download_pipeline",
+                data, file_hash, PIPELINE_MODE, **pipeline_params
+            )
+
+        else:  # Affine Transformation
+            st.sidebar.subheader("🔷 Affine Transform")
+            point_source = st.sidebar.radio("Sumber Titik", ["3 Titik Manual", "File Korespondensi (CSV/JSON)"])
+
+            if point_source == "3 Titik Manual":
+                st.sidebar.markdown("**Source Points (Titik Asal):**")
+
+                # Source Points
+                col1, col2 = st.sidebar.columns(2)
+                with col1:
+                    src_x1 = st.number_input("P1 X", 0, w, min(50, w), 5, key="src_x1")
+                    src_x2 = st.number_input("P2 X", 0, w, min(200, w), 5, key="src_x2")
+                    src_x3 = st.number_input("P3 X", 0, w, min(50, w), 5, key="src_x3")
+                with col2:
+                    src_y1 = st.number_input("P1 Y", 0, h, min(50, h), 5, key="src_y1")
+                    src_y2 = st.number_input("P2 Y", 0, h, min(50, h), 5, key="src_y2")
+                    src_y3 = st.number_input("P3 Y", 0, h, min(200, h), 5, key="src_y3")
+
+                st.sidebar.markdown("**Destination Points (Titik Tujuan):**")
+
+                # Destination Points
+                col3, col4 = st.sidebar.columns(2)
+                with col3:
+                    dst_x1 = st.number_input("P1' X", 0, w, min(10, w), 5, key="dst_x1")
+                    dst_x2 = st.number_input("P2' X", 0, w, min(200, w), 5, key="dst_x2")
+                    dst_x3 = st.number_input("P3' X", 0, w, min(100, w), 5, key="dst_x3")
+                with col4:
+                    dst_y1 = st.number_input("P1' Y", 0, h, min(100, h), 5, key="dst_y1")
+                    dst_y2 = st.number_input("P2' Y", 0, h, min(50, h), 5, key="dst_y2")
+                    dst_y3 = st.number_input("P3' Y", 0, h, min(250, h), 5, key="dst_y3")
+
+                pts1 = np.float32([[src_x1, src_y1], [src_x2, src_y2], [src_x3, src_y3]])
+                pts2 = np.float32([[dst_x1, dst_y1], [dst_x2, dst_y2], [dst_x3, dst_y3]])
+                affine_params = dict(pts1=pts1, pts2=pts2, interpolation=interpolation)
+
+            else:  # File korespondensi N titik, diestimasi dengan RANSAC
+                points_file = st.sidebar.file_uploader(
+                    "Upload Korespondensi", type=["csv", "json"],
+                    help="CSV x1,y1,x2,y2 per baris, atau JSON {\"src\": [[x, y], ...], \"dst\": [[x, y], ...]}"
+                )
+                if points_file is None:
+                    st.info("👈 Upload file korespondensi titik (CSV/JSON) untuk mengestimasi matriks affine.")
+                    st.stop()
+                try:
+                    estimate = estimate_from_correspondences(points_file.getvalue(), points_file.name)
+                except ValueError as exc:
+                    st.error(f"File korespondensi tidak valid: {exc}")
+                    st.stop()
+                affine_params = dict(matrix=estimate["matrix"], interpolation=interpolation)
+
+            # Preview affine
+            pyramid = single_preview_pyramid(data, file_hash, AFFINE_MODE, **affine_params)
+            original_preview = render_original_preview(pyramid, PREVIEW_WIDTH, allow_upscale=False)
+            transformed, (w_final, h_final) = render_preview(
+                pyramid, AFFINE_MODE, PREVIEW_WIDTH, allow_upscale=False, **affine_params
+            )
+
             # Tampilan
             col1, col2 = st.columns(2)
             with col1:
                 st.subheader("📷 Gambar Asli")
-                st.image(image, use_container_width=True)
+                show_image(original_preview, use_container_width=True)
                 st.caption(f"Ukuran: {w} x {h} pixels")
 
             with col2:
                 st.subheader("✨ Hasil Transformasi")
-                st.image(transformed, use_container_width=True)
-                h_final, w_final = transformed.shape[:2]
+                show_image(transformed, use_container_width=True)
                 st.caption(f"Ukuran: {w_final} x {h_final} pixels")
 
             st.markdown("---")
             st.info("🔷 Mode Affine Transformation aktif")
-            
+
             # Tampilkan info titik
-            col_info1, col_info2 = st.columns(2)
-            with col_info1:
-                st.markdown("**Titik Source:**")
-                st.text(f"P1: ({src_x1}, {src_y1})")
-                st.text(f"P2: ({src_x2}, {src_y2})")
-                st.text(f"P3: ({src_x3}, {src_y3})")
-            with col_info2:
-                st.markdown("**Titik Destination:**")
-                st.text(f"P1': ({dst_x1}, {dst_y1})")
-                st.text(f"P2': ({dst_x2}, {dst_y2})")
-                st.text(f"P3': ({dst_x3}, {dst_y3})")
+            if point_source == "3 Titik Manual":
+                col_info1, col_info2 = st.columns(2)
+                with col_info1:
+                    st.markdown("**Titik Source:**")
+                    st.text(f"P1: ({src_x1}, {src_y1})")
+                    st.text(f"P2: ({src_x2}, {src_y2})")
+                    st.text(f"P3: ({src_x3}, {src_y3})")
+                with col_info2:
+                    st.markdown("**Titik Destination:**")
+                    st.text(f"P1': ({dst_x1}, {dst_y1})")
+                    st.text(f"P2': ({dst_x2}, {dst_y2})")
+                    st.text(f"P3': ({dst_x3}, {dst_y3})")
+            else:
+                st.markdown(f"**Inlier RANSAC:** {estimate['inliers']} dari {estimate['points']} pasangan titik")
+                st.text(np.array2string(estimate["matrix"], precision=4, suppress_small=True))
 
             # Download
             st.markdown("---")
-            buf = BytesIO()
-            Image.fromarray(transformed).save(buf, format="PNG")
-            st.download_button(
-                label="📥 DOWNLOAD HASIL TRANSFORMASI",
-                data=buf.getvalue(),
-                file_name="affine_transformed.png",
-                mime="image/png"
+            cached_download_button(
+                "DOWNLOAD HASIL TRANSFORMASI", "affine_transformed", "download_affine",
+                data, file_hash, AFFINE_MODE, **affine_params
             )
 
         # Tombol reset
@@ -362,11 +623,19 @@ elif mode == "Batch Processing":
     else:
         st.success(f"✅ {len(uploaded_files)} gambar berhasil diupload")
 
+        # Pengaturan pemrosesan paralel
+        st.sidebar.subheader("⚡ Pemrosesan Paralel")
+        workers = st.sidebar.slider("Jumlah Worker", 1, os.cpu_count() or 1, os.cpu_count() or 1)
+        memory_limit_mb = st.sidebar.number_input("Batas Memori (MB)", 256, 65536, 2048, 256)
+
+        # Hanya halaman yang dibuka yang diproses dan ditampilkan
+        start, page_files = batch_page(uploaded_files)
+
         # Pilih mode transformasi untuk batch
         st.sidebar.subheader("🎯 Mode Transformasi")
-        transform_mode = st.sidebar.radio("Pilih Mode:", ["Basic (Rotation + Scaling)", "Affine Transformation"])
+        transform_mode = st.sidebar.radio("Pilih Mode:", [BASIC_MODE, AFFINE_MODE, PIPELINE_MODE])
 
-        if transform_mode == "Basic (Rotation + Scaling)":
+        if transform_mode == BASIC_MODE:
             # Mode ROI
             st.sidebar.subheader("🟥 ROI Scaling Mode")
             roi_scale_mode = st.sidebar.radio(
@@ -386,127 +655,307 @@ elif mode == "Batch Processing":
             tx = col1.number_input("Shift X", -500, 500, 0, 10)
             ty = col2.number_input("Shift Y", -500, 500, 0, 10)
 
-            # Proses setiap gambar
-            for idx, file in enumerate(uploaded_files):
-                st.markdown(f"## 📷 Gambar {idx + 1}: {file.name}")
-
-                file_bytes = np.asarray(bytearray(file.read()), dtype=np.uint8)
-                image_bgr = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
-                image = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+            if roi_scale_mode == "Scale Full Image":
+                archive_download_button(
+                    uploaded_files, transform_mode, workers,
+                    rotation_angle=rotation_angle, scale_factor=scale_factor, tx=tx, ty=ty,
+                    interpolation=interpolation
+                )
+                st.markdown("---")
 
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.subheader("Gambar Asli")
-                    st.image(display_resized(image), use_container_width=False)
-                    h, w = image.shape[:2]
-                    st.caption(f"Ukuran: {w} x {h} pixels")
+                # Proses semua gambar secara paralel, tampilkan sesuai urutan upload
+                results = run_batch(
+                    page_files, transform_mode, workers, memory_limit_mb,
+                    rotation_angle=rotation_angle, scale_factor=scale_factor, tx=tx, ty=ty,
+                    interpolation=interpolation
+                )
+                for offset, result in results:
+                    idx = start + offset
+                    st.markdown(f"## 📷 Gambar {idx + 1}: {uploaded_files[idx].name}")
 
-                if roi_scale_mode == "Scale Full Image":
-                    transformed = apply_basic_transform(image, rotation_angle, scale_factor, tx, ty)
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.subheader("Gambar Asli")
+                        show_image(result["original"])
+                        w, h = result["size"]
+                        st.caption(f"Ukuran: {w} x {h} pixels")
 
                     with col2:
                         st.subheader("Hasil Transformasi")
-                        st.image(display_resized(transformed), use_container_width=False)
-                        h_final, w_final = transformed.shape[:2]
+                        show_image(result["transformed"])
+                        w_final, h_final = result["final_size"]
                         st.caption(f"Ukuran: {w_final} x {h_final} pixels")
 
-                    buf = BytesIO()
-                    Image.fromarray(transformed).save(buf, format="PNG")
-                    st.download_button(
-                        f"📥 Download Hasil {idx + 1}",
-                        buf.getvalue(),
-                        file_name=f"transformed_{idx + 1}.png",
-                        key=f"download_basic_{idx}"
+                    cached_download_button(
+                        f"Download Hasil {idx + 1}", f"transformed_{idx + 1}", f"download_basic_{idx}",
+                        uploaded_files[idx].getvalue(), result["hash"], BASIC_MODE,
+                        rotation_angle=rotation_angle, scale_factor=scale_factor, tx=tx, ty=ty,
+                        interpolation=interpolation
                     )
 
-                else:  # Scale ROI Saja
-                    st.markdown("**🟥 ROI Scaling**")
-                    original_roi, scaled_roi = scale_roi(image, scale_factor)
+                    st.markdown("---")
 
-                    col3, col4 = st.columns(2)
-                    with col3:
-                        st.write("ROI Asli:")
-                        st.image(display_resized(original_roi), use_container_width=False)
-
-                    with col4:
-                        st.write("ROI Setelah Scaling:")
-                        st.image(display_resized(scaled_roi), use_container_width=False)
-
-                    buf = BytesIO()
-                    Image.fromarray(scaled_roi).save(buf, format="PNG")
-                    st.download_button(
-                        f"📥 Download ROI Scaled {idx + 1}",
-                        buf.getvalue(),
-                        file_name=f"scaled_roi_{idx + 1}.png",
-                        key=f"download_roi_{idx}"
+            else:  # Scale ROI Saja
+                roi_source = st.sidebar.radio("Sumber ROI", ["ROI per Gambar", "Satu ROI untuk Semua Gambar"])
+
+                if roi_source == "ROI per Gambar":
+                    # Interaktif, satu cropper per gambar
+                    for idx, file in enumerate(page_files, start):
+                        st.markdown(f"## 📷 Gambar {idx + 1}: {file.name}")
+                        data = file.getvalue()
+                        file_hash = content_hash(data)
+                        st.caption("Ukuran: {} x {} pixels".format(*image_size(data)))
+
+                        st.markdown("**🟥 ROI Scaling**")
+                        # Key memuat index agar file yang sama diupload dua kali tetap unik
+                        roi_key = f"{idx}_{file_hash}"
+                        boxes = saved_rois(roi_key, select_roi(data, file_hash, f"cropper_{roi_key}"))
+                        result = process_roi_item(data, boxes, scale_factor, transform_cache,
+                                                  interpolation=interpolation)
+
+                        for n, (box, roi) in enumerate(zip(boxes, result["rois"]), 1):
+                            col3, col4 = st.columns(2)
+                            with col3:
+                                st.write(f"ROI {n} Asli:")
+                                show_image(roi["original"])
+                            with col4:
+                                st.write(f"ROI {n} Setelah Scaling:")
+                                show_image(roi["scaled"])
+
+                            roi_download_button(
+                                f"Download ROI {n} Scaled {idx + 1}", f"scaled_roi_{idx + 1}_{n}",
+                                f"download_roi_{idx}_{n}", data, file_hash, box
+                            )
+
+                        st.markdown("---")
+
+                else:  # ROI dari satu gambar referensi diterapkan ke semua gambar
+                    ref_idx = st.sidebar.selectbox(
+                        "Gambar untuk Memilih ROI", range(len(uploaded_files)),
+                        format_func=lambda i: f"{i + 1}. {uploaded_files[i].name}"
+                    )
+                    ref_data = uploaded_files[ref_idx].getvalue()
+                    ref_hash = content_hash(ref_data)
+
+                    st.markdown("### 🟥 Pilih ROI")
+                    st.info("Posisi ROI disimpan relatif terhadap ukuran gambar, lalu diterapkan ke semua gambar.")
+                    boxes = saved_rois("batch", select_roi(ref_data, ref_hash, "cropper_batch"))
+                    st.markdown("---")
+
+                    # Crop + scaling semua gambar di halaman ini secara paralel
+                    items = [(file.name, file.getvalue()) for file in page_files]
+                    progress_bar = st.progress(0.0, text="Memproses ROI...")
+
+                    def roi_worker(item):
+                        name, data = item
+                        with profile_item(name):
+                            return process_roi_item(data, boxes, scale_factor, transform_cache,
+                                                    interpolation=interpolation)
+
+                    executor = BatchExecutor(max_workers=workers, memory_limit=memory_limit_mb * 1024 * 1024)
+                    results = executor.map(
+                        roi_worker, items, estimate=lambda item: estimate_batch_bytes(item[1]),
+                        progress=lambda done, total: progress_bar.progress(
+                            done / total, text=f"Memproses ROI... {done}/{total}"
+                        )
                     )
+                    for offset, result in results:
+                        idx = start + offset
+                        st.markdown(f"## 📷 Gambar {idx + 1}: {uploaded_files[idx].name}")
+                        for n, (box, roi) in enumerate(zip(boxes, result["rois"]), 1):
+                            col3, col4 = st.columns(2)
+                            with col3:
+                                st.write(f"ROI {n} Asli:")
+                                show_image(roi["original"])
+                                st.caption("Ukuran: {} x {} pixels".format(*roi["size"]))
+                            with col4:
+                                st.write(f"ROI {n} Setelah Scaling:")
+                                show_image(roi["scaled"])
+                                st.caption("Ukuran: {} x {} pixels".format(*roi["scaled_size"]))
+
+                            roi_download_button(
+                                f"Download ROI {n} Scaled {idx + 1}", f"scaled_roi_{idx + 1}_{n}",
+                                f"download_roi_{idx}_{n}", items[offset][1], result["hash"], box
+                            )
+
+                        st.markdown("---")
+
+        elif transform_mode == PIPELINE_MODE:
+            pipeline_params, preset = pipeline_editor()
+            show_pipeline_plan(preset, image_size(uploaded_files[0].getvalue())[::-1])
+
+            archive_download_button(uploaded_files, transform_mode, workers, **pipeline_params)
+            st.markdown("---")
+
+            # Proses semua gambar secara paralel, tampilkan sesuai urutan upload
+            results = run_batch(page_files, transform_mode, workers, memory_limit_mb, **pipeline_params)
+            for offset, result in results:
+                idx = start + offset
+                st.markdown(f"## 📷 Gambar {idx + 1}: {uploaded_files[idx].name}")
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.subheader("Gambar Asli")
+                    show_image(result["original"])
+                    w, h = result["size"]
+                    st.caption(f"Ukuran: {w} x {h} pixels")
+
+                with col2:
+                    st.subheader("Hasil Transformasi")
+                    show_image(result["transformed"])
+                    w_final, h_final = result["final_size"]
+                    st.caption(f"Ukuran: {w_final} x {h_final} pixels")
+
+                cached_download_button(
+                    f"Download Hasil {idx + 1}", f"pipeline_transformed_{idx + 1}", f"download_pipeline_{idx}",
+                    uploaded_files[idx].getvalue(), result["hash"], PIPELINE_MODE, **pipeline_params
+                )
 
                 st.markdown("---")
 
         else:  # Affine Transformation untuk Batch
-            st.info("⚠️ Untuk Affine Transformation dalam batch processing, semua gambar akan menggunakan titik yang sama. Pastikan gambar memiliki ukuran yang serupa.")
-            
             # Ambil ukuran gambar pertama sebagai referensi
-            first_file_bytes = np.asarray(bytearray(uploaded_files[0].read()), dtype=np.uint8)
-            first_image = cv2.cvtColor(cv2.imdecode(first_file_bytes, cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB)
-            h_ref, w_ref = first_image.shape[:2]
-            
+            w_ref, h_ref = image_size(uploaded_files[0].getvalue())
+
             st.sidebar.subheader("🔷 Affine Transform")
-            st.sidebar.markdown(f"**Referensi ukuran: {w_ref} x {h_ref}**")
-            st.sidebar.markdown("**Source Points:**")
-            
-            # Source Points
-            col1, col2 = st.sidebar.columns(2)
-            with col1:
-                src_x1 = st.number_input("P1 X", 0, w_ref, min(50, w_ref), 5, key="batch_src_x1")
-                src_x2 = st.number_input("P2 X", 0, w_ref, min(200, w_ref), 5, key="batch_src_x2")
-                src_x3 = st.number_input("P3 X", 0, w_ref, min(50, w_ref), 5, key="batch_src_x3")
-            with col2:
-                src_y1 = st.number_input("P1 Y", 0, h_ref, min(50, h_ref), 5, key="batch_src_y1")
-                src_y2 = st.number_input("P2 Y", 0, h_ref, min(50, h_ref), 5, key="batch_src_y2")
-                src_y3 = st.number_input("P3 Y", 0, h_ref, min(200, h_ref), 5, key="batch_src_y3")
-            
-            st.sidebar.markdown("**Destination Points:**")
-            col3, col4 = st.sidebar.columns(2)
-            with col3:
-                dst_x1 = st.number_input("P1' X", 0, w_ref, min(10, w_ref), 5, key="batch_dst_x1")
-                dst_x2 = st.number_input("P2' X", 0, w_ref, min(200, w_ref), 5, key="batch_dst_x2")
-                dst_x3 = st.number_input("P3' X", 0, w_ref, min(100, w_ref), 5, key="batch_dst_x3")
-            with col4:
-                dst_y1 = st.number_input("P1' Y", 0, h_ref, min(100, h_ref), 5, key="batch_dst_y1")
-                dst_y2 = st.number_input("P2' Y", 0, h_ref, min(50, h_ref), 5, key="batch_dst_y2")
-                dst_y3 = st.number_input("P3' Y", 0, h_ref, min(250, h_ref), 5, key="batch_dst_y3")
-            
-            pts1 = np.float32([[src_x1, src_y1], [src_x2, src_y2], [src_x3, src_y3]])
-            pts2 = np.float32([[dst_x1, dst_y1], [dst_x2, dst_y2], [dst_x3, dst_y3]])
-
-            # Reset file pointer untuk membaca ulang
-            for idx, file in enumerate(uploaded_files):
-                st.markdown(f"## 📷 Gambar {idx + 1}: {file.name}")
-                
-                file.seek(0)  # Reset pointer
-                file_bytes = np.asarray(bytearray(file.read()), dtype=np.uint8)
-                image_bgr = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
-                image = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
-
-                transformed = apply_affine_transform(image, pts1, pts2)
+            affine_method = st.sidebar.radio("Metode Affine", ["3 Titik Manual", "Registrasi ke Referensi"])
+
+            if affine_method == "3 Titik Manual":
+                st.info("⚠️ Untuk Affine Transformation dalam batch processing, semua gambar akan menggunakan titik yang sama. Pastikan gambar memiliki ukuran yang serupa.")
+                st.sidebar.markdown(f"**Referensi ukuran: {w_ref} x {h_ref}**")
+                st.sidebar.markdown("**Source Points:**")
+
+                # Source Points
+                col1, col2 = st.sidebar.columns(2)
+                with col1:
+                    src_x1 = st.number_input("P1 X", 0, w_ref, min(50, w_ref), 5, key="batch_src_x1")
+                    src_x2 = st.number_input("P2 X", 0, w_ref, min(200, w_ref), 5, key="batch_src_x2")
+                    src_x3 = st.number_input("P3 X", 0, w_ref, min(50, w_ref), 5, key="batch_src_x3")
+                with col2:
+                    src_y1 = st.number_input("P1 Y", 0, h_ref, min(50, h_ref), 5, key="batch_src_y1")
+                    src_y2 = st.number_input("P2 Y", 0, h_ref, min(50, h_ref), 5, key="batch_src_y2")
+                    src_y3 = st.number_input("P3 Y", 0, h_ref, min(200, h_ref), 5, key="batch_src_y3")
+
+                st.sidebar.markdown("**Destination Points:**")
+                col3, col4 = st.sidebar.columns(2)
+                with col3:
+                    dst_x1 = st.number_input("P1' X", 0, w_ref, min(10, w_ref), 5, key="batch_dst_x1")
+                    dst_x2 = st.number_input("P2' X", 0, w_ref, min(200, w_ref), 5, key="batch_dst_x2")
+                    dst_x3 = st.number_input("P3' X", 0, w_ref, min(100, w_ref), 5, key="batch_dst_x3")
+                with col4:
+                    dst_y1 = st.number_input("P1' Y", 0, h_ref, min(100, h_ref), 5, key="batch_dst_y1")
+                    dst_y2 = st.number_input("P2' Y", 0, h_ref, min(50, h_ref), 5, key="batch_dst_y2")
+                    dst_y3 = st.number_input("P3' Y", 0, h_ref, min(250, h_ref), 5, key="batch_dst_y3")
+
+                pts1 = np.float32([[src_x1, src_y1], [src_x2, src_y2], [src_x3, src_y3]])
+                pts2 = np.float32([[dst_x1, dst_y1], [dst_x2, dst_y2], [dst_x3, dst_y3]])
+                # Matriks dihitung sekali untuk seluruh batch, bukan per gambar
+                affine_params = dict(matrix=affine_matrix(pts1, pts2), interpolation=interpolation)
+                item_params = None
+
+            else:  # Registrasi fitur: setiap gambar diselaraskan ke gambar referensi
+                ref_idx = st.sidebar.selectbox(
+                    "Gambar Referensi", range(len(uploaded_files)),
+                    format_func=lambda i: f"{i + 1}. {uploaded_files[i].name}"
+                )
+                detector = st.sidebar.selectbox("Detektor Fitur", list(DETECTORS))
+                ref_data = uploaded_files[ref_idx].getvalue()
+                ref_hash = content_hash(ref_data)
+                ref_size = image_size(ref_data)
+                st.info(f"🧭 Setiap gambar diselaraskan ke gambar referensi {ref_idx + 1} "
+                        f"({ref_size[0]} x {ref_size[1]}) dengan {detector} + RANSAC.")
+                affine_params = dict(interpolation=interpolation)
+
+                def item_params(data, file_hash):
+                    reg = transform_cache.registration(ref_data, ref_hash, data, file_hash, detector)
+                    if reg["matrix"] is None:
+                        raise ValueError(f"Registrasi gagal ({reg['matches']} pasangan fitur cocok)")
+                    return {"matrix": reg["matrix"], "size": ref_size}
+
+            archive_download_button(uploaded_files, transform_mode, workers, item_params, **affine_params)
+            st.markdown("---")
+
+            # Proses semua gambar secara paralel, tampilkan sesuai urutan upload
+            results = run_batch(page_files, transform_mode, workers, memory_limit_mb, item_params, **affine_params)
+            for offset, result in results:
+                idx = start + offset
+                st.markdown(f"## 📷 Gambar {idx + 1}: {uploaded_files[idx].name}")
+                if "error" in result:
+                    st.warning(f"⚠️ {result['error']}")
+                    st.markdown("---")
+                    continue
+
+                if item_params is not None:
+                    reg = transform_cache.registration(
+                        ref_data, ref_hash, uploaded_files[idx].getvalue(), result["hash"], detector
+                    )
+                    st.caption(f"Registrasi: {reg['inliers']} inlier dari {reg['matches']} pasangan fitur")
 
                 col1, col2 = st.columns(2)
                 with col1:
                     st.subheader("Gambar Asli")
-                    st.image(display_resized(image), use_container_width=False)
-                    
+                    show_image(result["original"])
+
                 with col2:
                     st.subheader("Hasil Transformasi")
-                    st.image(display_resized(transformed), use_container_width=False)
-
-                buf = BytesIO()
-                Image.fromarray(transformed).save(buf, format="PNG")
-                st.download_button(
-                    f"📥 Download Hasil {idx + 1}",
-                    buf.getvalue(),
-                    file_name=f"affine_transformed_{idx + 1}.png",
-                    key=f"download_affine_{idx}"
+                    show_image(result["transformed"])
+
+                cached_download_button(
+                    f"Download Hasil {idx + 1}", f"affine_transformed_{idx + 1}", f"download_affine_{idx}",
+                    uploaded_files[idx].getvalue(), result["hash"], AFFINE_MODE, **result["params"]
                 )
 
-                st.markdown("---")
\ No newline at end of file
+                st.markdown("---")
+
+# ========================================================================
+# Panel Performance (sidebar)
+# ========================================================================
+if profiler is not None:
+    st.sidebar.markdown("**Waktu per tahap (rerun ini)**")
+    summary = profiler.summary()
+    if summary:
+        st.sidebar.dataframe([
+            {
+                "tahap": name,
+                "panggilan": s["calls"],
+                "total (ms)": round(s["total_s"] * 1000, 2),
+                "rata-rata (ms)": round(s["mean_s"] * 1000, 2),
+                "maks (ms)": round(s["max_s"] * 1000, 2),
+                "MB": round(s["bytes"] / 2**20, 2),
+            }
+            for name, s in summary.items()
+        ], hide_index=True)
+    else:
+        st.sidebar.caption("Belum ada tahap yang tercatat.")
+
+    per_item = profiler.by_item()
+    if per_item:
+        st.sidebar.markdown("**Waktu per item batch**")
+        st.sidebar.dataframe([
+            {"item": name, "total (ms)": round(seconds * 1000, 2)} for name, seconds in per_item.items()
+        ], hide_index=True)
+
+    st.sidebar.markdown(f"**Backend: {get_backend().name}**")
+    calibration = calibration_results()
+    if calibration:
+        st.sidebar.dataframe([
+            {
+                "backend": r["name"],
+                "lolos": r["ok"],
+                "selisih rata-rata": None if r["mean_diff"] is None else round(r["mean_diff"], 4),
+                "waktu (ms)": None if r["seconds"] is None else round(r["seconds"] * 1000, 2),
+            }
+            for r in calibration
+        ], hide_index=True)
+
+    st.sidebar.markdown("**Cache (kumulatif)**")
+    st.sidebar.dataframe([
+        {"layer": name, "hit": layer.hits, "miss": layer.misses, "MB": round(layer.current_bytes / 2**20, 1)}
+        for name, layer in (("decoded", transform_cache.decoded), ("proxy", transform_cache.proxies),
+                            ("hasil", transform_cache.results), ("encoded", transform_cache.encoded))
+    ], hide_index=True)
+
+    st.sidebar.download_button(
+        "📥 Log profil (JSON lines)", "\n".join(profiler.log_lines()) + "\n",
+        file_name="profile.jsonl", mime="application/json", key="download_profile"
+    )
\ No newline at end of file